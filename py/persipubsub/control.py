@@ -137,8 +137,7 @@ class Control:
         self.set_hwm(hwm=high_water_mark)
         self.set_strategy(strategy=strategy)
 
-        for sub in self.subscriber_ids:
-            self._add_sub(sub_id=sub)
+        self._add_subs(sub_ids=self.subscriber_ids)
 
         # load initialized queue
         self.queue = persipubsub.queue._Queue(
@@ -214,11 +213,9 @@ class Control:
                 txn=txn,
                 create=False)
 
-            cursor = txn.cursor(db=sub_db)
-            # check if database is not empty
-            if cursor.first():
-                for key in cursor.iternext(keys=True, values=False):
-                    message_ids.add(key)
+            # an unpositioned cursor starts at the first key, if any
+            message_ids.update(
+                txn.cursor(db=sub_db).iternext(keys=True, values=False))
 
             txn.drop(db=sub_db, delete=False)
 
@@ -257,24 +254,25 @@ class Control:
         return has_own_db or in_sub_set
 
     @icontract.ensure(
-        lambda self, sub_id: self._has_sub(sub_id=sub_id),
+        lambda self, sub_ids: all(
+            self._has_sub(sub_id=sub_id) for sub_id in sub_ids),
         enabled=icontract.SLOW)
-    def _add_sub(self, sub_id: str) -> None:
+    def _add_subs(self, sub_ids: Set[str]) -> None:
         """
-        Add a subscriber and create its corresponding database.
+        Add subscribers and create their corresponding databases.
 
-        :param sub_id: identifier of the subscriber which should be added
+        All subscribers are added in a single transaction.
+
+        :param sub_ids: identifiers of the subscribers which should be added
         """
         with self.env.begin(write=True) as txn:
-            _ = self.env.open_db(
-                key=persipubsub.database.str_to_bytes(sub_id),
-                txn=txn,
-                create=True)
-
             subscriber_db = self.env.open_db(
                 persipubsub.database.SUBSCRIBER_DB, txn=txn, create=True)
-            txn.put(
-                key=persipubsub.database.str_to_bytes(sub_id), db=subscriber_db)
+
+            for sub_id in sub_ids:
+                sub_key = persipubsub.database.str_to_bytes(sub_id)
+                _ = self.env.open_db(key=sub_key, txn=txn, create=True)
+                txn.put(key=sub_key, db=subscriber_db)
 
     @icontract.ensure(
         lambda self, sub_id: not self._has_sub(sub_id=sub_id),
@@ -297,11 +295,9 @@ class Control:
                     txn=txn,
                     create=False)
 
-                cursor = txn.cursor(db=sub_db)
-                # check if database is not empty
-                if cursor.first():
-                    for key in cursor.iternext(keys=True, values=False):
-                        msg_of_sub.add(key)
+                # an unpositioned cursor starts at the first key, if any
+                msg_of_sub.update(
+                    txn.cursor(db=sub_db).iternext(keys=True, values=False))
                 txn.drop(db=sub_db)
 
             except lmdb.NotFoundError:
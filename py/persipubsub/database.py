@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 """Set default values of persipubsub and offers encoding tools."""
-from typing import Set
+from typing import Set, Union
 
 import lmdb
 
@@ -76,17 +76,20 @@ def int_to_bytes(value: int) -> bytes:
     :param value: any integer
     :return: integer value representation as bytes
     """
-    return value.to_bytes(length=BYTES_LENGTH, byteorder=BYTES_ORDER)
+    return value.to_bytes(BYTES_LENGTH, BYTES_ORDER)
 
 
-def bytes_to_int(array_of_bytes: bytes) -> int:
+def bytes_to_int(array_of_bytes: Union[bytes, memoryview]) -> int:
     """
     Decode an array of bytes to an integer.
 
+    The array can also be a view into a transaction opened with buffers=True,
+    in which case it is decoded without copying.
+
     :param array_of_bytes: any array of bytes
     :return: array of bytes representation as integer value
     """
-    return int.from_bytes(bytes=array_of_bytes, byteorder=BYTES_ORDER)
+    return int.from_bytes(array_of_bytes, BYTES_ORDER)
 
 
 class QueueData:
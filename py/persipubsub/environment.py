@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 """Create new persipubsub components."""
 
+import os
 import pathlib
-from typing import Any, Optional, Set
+import queue as stdlib_queue
+import threading
+import weakref
+from typing import Any, Dict, Optional, Set, Union
 
 import icontract
 
@@ -14,6 +18,23 @@ import persipubsub.subscriber
 
 # pylint: disable = protected-access
 
+_Component = Union[persipubsub.publisher.Publisher, persipubsub.subscriber.
+                   Subscriber]
+
+
+class _ThreadComponents(threading.local):
+    """Hold the components handed out to the current thread."""
+
+    def __init__(self) -> None:
+        """Initialize with no components in the current thread yet."""
+        super().__init__()
+        # publishers keyed by autosync
+        self.publishers = {
+        }  # type: Dict[bool, persipubsub.publisher.Publisher]
+        # subscribers keyed by their identifier
+        self.subscribers = {
+        }  # type: Dict[str, persipubsub.subscriber.Subscriber]
+
 
 class Environment:
     """
@@ -34,19 +55,37 @@ class Environment:
     :vartype path: pathlib.Path
     """
 
-    def __init__(self, path: pathlib.Path) -> None:
+    def __init__(
+            self,
+            path: pathlib.Path,
+            durability: persipubsub.queue.Durability = persipubsub.queue.
+            Durability.SYNC,
+            max_db_size_bytes: int = persipubsub.database.DEFAULT_MAX_DB_SIZE
+    ) -> None:
         """
         Initialize.
 
         :param path: to the queue
+        :param durability: of the messages committed through this environment
+        :param max_db_size_bytes:
+            size of the memory map and thus the maximal size of the queue
+            (in bytes)
         """
         self.path = path
         self._env = persipubsub.queue._initialize_environment(
             queue_dir=self.path,
             max_reader_num=persipubsub.database.DEFAULT_MAX_READERS,
             max_db_num=persipubsub.database.DEFAULT_MAX_DB_NUM,
-            max_db_size_bytes=persipubsub.database.DEFAULT_MAX_DB_SIZE)
+            max_db_size_bytes=max_db_size_bytes,
+            durability=durability)
         self.closed = False
+        self._thread_components = _ThreadComponents()
+        # All the components handed out per thread, so that they can be closed
+        # together with the environment. The components of finished threads
+        # are dropped together with their thread-local storage.
+        self._handed_out = weakref.WeakSet(
+        )  # type: weakref.WeakSet[_Component]
+        self._handed_out_lock = threading.Lock()
 
     def __enter__(self) -> 'Environment':
         """Enter the context and give environment prepared to constructor."""
@@ -72,6 +111,13 @@ class Environment:
         https://github.com/dw/py-lmdb/blob/master/examples/address-book.py
         :return:
         """
+        with self._handed_out_lock:
+            components = list(self._handed_out)
+            self._handed_out.clear()
+
+        for component in components:
+            component.close()
+
         self._env.close()
         self.closed = True
 
@@ -122,12 +168,91 @@ class Environment:
         return persipubsub.subscriber.initialize(
             path=self.path, env=self._env, identifier=identifier)
 
+    @icontract.require(lambda self: not self.closed)
+    def get_or_create_publisher(
+            self, autosync: bool = False) -> persipubsub.publisher.Publisher:
+        """
+        Give the publisher of the calling thread, creating it on first use.
+
+        :param autosync: if True, store data automatically in LMDB
+        :return: Publisher to send messages
+        """
+        publishers = self._thread_components.publishers
+        publisher = publishers.get(autosync)
+        if publisher is None or publisher.closed:
+            publisher = self.new_publisher(autosync=autosync)
+            publishers[autosync] = publisher
+            with self._handed_out_lock:
+                self._handed_out.add(publisher)
+
+        return publisher
+
+    @icontract.require(lambda self: not self.closed)
+    def get_or_create_subscriber(
+            self, identifier: str) -> persipubsub.subscriber.Subscriber:
+        """
+        Give the subscriber of the calling thread, creating it on first use.
+
+        :param identifier: of the subscriber
+        :return: Subscriber to receive messages
+        """
+        subscribers = self._thread_components.subscribers
+        subscriber = subscribers.get(identifier)
+        if subscriber is None or subscriber.closed:
+            subscriber = self.new_subscriber(identifier=identifier)
+            subscribers[identifier] = subscriber
+            with self._handed_out_lock:
+                self._handed_out.add(subscriber)
+
+        return subscriber
+
+    @icontract.require(lambda size: size is None or size > 0)
+    @icontract.require(lambda self: not self.closed)
+    def publisher_pool(
+            self, size: Optional[int] = None, autosync: bool = False
+    ) -> 'stdlib_queue.Queue[persipubsub.publisher.Publisher]':
+        """
+        Create a pool of publishers to be shared among many threads.
+
+        A thread takes a publisher with get() and returns it with put() once
+        it has sent its messages. The publishers are closed together with the
+        environment.
+
+        :param size: number of publishers; the number of CPUs if not given
+        :param autosync: if True, store data automatically in LMDB
+        :return: queue filled with the publishers
+        """
+        pool_size = size if size is not None else (os.cpu_count() or 1)
+
+        publishers = [
+            self.new_publisher(autosync=autosync) for _ in range(pool_size)
+        ]
+        with self._handed_out_lock:
+            self._handed_out.update(publishers)
+
+        pool = stdlib_queue.Queue(
+            maxsize=pool_size
+        )  # type: stdlib_queue.Queue[persipubsub.publisher.Publisher]
+        for publisher in publishers:
+            pool.put(publisher)
+
+        return pool
+
 
-def initialize(path: pathlib.Path) -> Environment:
+def initialize(path: pathlib.Path,
+               durability: persipubsub.queue.Durability = persipubsub.queue.
+               Durability.SYNC,
+               max_db_size_bytes: int = persipubsub.database.DEFAULT_MAX_DB_SIZE
+               ) -> Environment:
     """
     Create a new environment.
 
     :param path: path to the queue
+    :param durability: of the messages committed through the environment
+    :param max_db_size_bytes:
+        size of the memory map and thus the maximal size of the queue
+        (in bytes)
     :return: Environment to create control, publisher and subscriber
     """
-    return Environment(path=path)
+    return Environment(
+        path=path, durability=durability, max_db_size_bytes=max_db_size_bytes)
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 """Publish messages to a queue and save them persistently."""
 
+import itertools
 import pathlib
-from typing import Any, List, Optional, Union
+from typing import Any, Iterable, Optional, Union
 
 import icontract
 import lmdb
@@ -71,25 +72,43 @@ class Publisher:
         self.closed = True
 
     @icontract.require(lambda self: not self.closed)
-    def send(self, msg: bytes) -> None:
+    def send(self, msg: Union[bytes, bytearray, memoryview]) -> None:
         """
         Write one message to queue in one transaction.
 
-        :param msg: to queue that all subscribers can read it
+        :param msg:
+            to queue that all subscribers can read it. Any bytes-like object is
+            accepted so that a buffer can be reused between sends.
         """
         assert self.queue is not None
         self.queue.put(msg=msg)
 
+    @icontract.require(lambda batch_size: batch_size is None or batch_size > 0)
     @icontract.require(lambda self: not self.closed)
-    def send_many(self, msgs: List[bytes]) -> None:
+    def send_many(self, msgs: Iterable[bytes],
+                  batch_size: Optional[int] = None) -> None:
         """
         Write multiple messages to queue in one transaction.
 
-        :param msgs: to queue that all subscribers can read them
+        :param msgs:
+            to queue that all subscribers can read them. The messages are
+            consumed lazily so that, e.g., itertools.repeat(msg, count) sends
+            the same message count times without building a list.
+        :param batch_size:
+            if set, commit a transaction after every batch_size messages
+            instead of writing all the messages in a single transaction
         """
         assert self.queue is not None
         if self.autosync:
             for msg in msgs:
                 self.queue.put(msg=msg)
-        else:
+        elif batch_size is None:
             self.queue.put_many_flush_once(msgs=msgs)
+        else:
+            msg_iter = iter(msgs)
+            while True:
+                batch = list(itertools.islice(msg_iter, batch_size))
+                if not batch:
+                    break
+
+                self.queue.put_many_flush_once(msgs=batch)
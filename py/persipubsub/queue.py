@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 """Store messages in a local LMDB."""
+import contextlib
 import datetime
 import enum
 import pathlib
+import threading
 import uuid
-from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from typing import (Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple,
+                    Union)
 
 import icontract
 import lmdb
@@ -27,6 +30,21 @@ class Strategy(enum.Enum):
     PRUNE_LAST = 1
 
 
+class Durability(enum.Enum):
+    """
+    Hold possible durability levels of committed messages.
+
+    SYNC flushes every commit to disk. NOSYNC leaves flushing to the operating
+    system so that a system crash might undo the last commits, but the queue
+    stays consistent. ASYNC additionally writes through a writable memory map
+    which is flushed asynchronously; a system crash might corrupt the queue.
+    """
+
+    SYNC = 0
+    NOSYNC = 1
+    ASYNC = 2
+
+
 def _parse_strategy(identifier: str) -> Strategy:
     """
     Parse overflow strategy.
@@ -71,7 +89,8 @@ def _initialize_environment(
         queue_dir: pathlib.Path,
         max_reader_num: int = 1024,
         max_db_num: int = 1024,
-        max_db_size_bytes: int = 32 * 1024**3) -> lmdb.Environment:
+        max_db_size_bytes: int = 32 * 1024**3,
+        durability: Durability = Durability.SYNC) -> lmdb.Environment:
     """
     Initialize the queue; the queue directory is assumed to exist.
 
@@ -91,26 +110,95 @@ def _initialize_environment(
     | start more than this many read transactions will fail.
     | max_dbs: Maximum number of databases available. If 0, assume environment
     | will be used as a single database.
+    | sync, metasync: If False, do not flush data and metadata buffers to disk
+    | when committing a transaction.
+    | writemap, map_async: If True, use a writeable memory map which is flushed
+    | asynchronously.
 
     :param queue_dir: where the queue is stored
     :param max_reader_num: maximal number of readers
     :param max_db_num: maximal number of databases
     :param max_db_size_bytes: maximal size of database (in bytes)
+    :param durability: of the committed transactions
     :return: Load or if needed create LMDB from directory
     """
     if not queue_dir.exists():
         raise RuntimeError(
             "The queue directory does not exist: {}".format(queue_dir))
 
+    sync = durability == Durability.SYNC
+    use_map = durability == Durability.ASYNC
+
     env = lmdb.open(
         path=queue_dir.as_posix(),
         map_size=max_db_size_bytes,
         subdir=True,
         max_readers=max_reader_num,
-        max_dbs=max_db_num)
+        max_dbs=max_db_num,
+        sync=sync,
+        metasync=sync,
+        writemap=use_map,
+        map_async=use_map)
     return env
 
 
+def _now() -> float:
+    """
+    Give the current time of the queue.
+
+    All timestamps of the module are taken from this clock so that the tests
+    can advance it without touching the standard library.
+
+    The clock gives the UTC time as if it were the local time, since the
+    timestamps and message IDs of the existing queues were always stored that
+    way. Outside of UTC, it is off from time.time() by the UTC offset.
+
+    :return: seconds since the epoch
+    """
+    return datetime.datetime.now(
+        datetime.timezone.utc).replace(tzinfo=None).timestamp()
+
+
+class _MsgIdClock:
+    """Give strictly increasing timestamps for the message IDs of a process."""
+
+    def __init__(self) -> None:
+        """Initialize with no message ID issued yet."""
+        self._lock = threading.Lock()
+        self._last_micros = 0
+
+    def next_micros(self) -> int:
+        """
+        Give the current time, but at least one microsecond after the last one.
+
+        :return: microseconds since the epoch
+        """
+        with self._lock:
+            self._last_micros = max(
+                int(_now() * 1000000), self._last_micros + 1)
+            return self._last_micros
+
+
+_MSG_ID_CLOCK = _MsgIdClock()
+
+
+def _new_msg_id() -> bytes:
+    """
+    Generate a unique message ID which sorts in the order of publishing.
+
+    The ID keeps the layout of the IDs of older queues: the publishing time as
+    seconds with a fraction, followed by a random UUID which makes the ID
+    unique across processes. The fraction always has six digits and the
+    timestamps of a process strictly increase, so that the IDs of a process
+    sort in the order of publishing, also after the IDs already stored.
+
+    :return: message ID
+    """
+    micros = _MSG_ID_CLOCK.next_micros()
+    return persipubsub.database.str_to_bytes('{}.{:06d}{}'.format(
+        micros // 1000000, micros % 1000000, uuid.uuid4()))
+
+
 def _prune_dangling_messages_for(queue: '_Queue',
                                  subscriber_ids: Set[str]) -> None:
     """
@@ -119,14 +207,11 @@ def _prune_dangling_messages_for(queue: '_Queue',
     :param queue: of which dangling messages should be pruned
     :param subscriber_ids: subscribers of which dangling msgs should be pruned
     """
+    # pylint: disable=protected-access
     assert queue.env is not None
-    with queue.env.begin(write=True) as txn:
-        pending_db = queue.env.open_db(
-            key=persipubsub.database.PENDING_DB, txn=txn, create=False)
-        meta_db = queue.env.open_db(
-            key=persipubsub.database.META_DB, txn=txn, create=False)
-        data_db = queue.env.open_db(
-            key=persipubsub.database.DATA_DB, txn=txn, create=False)
+    pending_db = queue._handles.pending_db
+    meta_db = queue._handles.meta_db
+    data_db = queue._handles.data_db
 
     # Definition of dangling messages:
     #   - having no pending subscribers
@@ -135,7 +220,6 @@ def _prune_dangling_messages_for(queue: '_Queue',
     msgs_to_delete = set()  # type: Set[bytes]
     with queue.env.begin(db=pending_db) as txn:
         cursor = txn.cursor()
-        cursor.first()
         for key, pending_subscribers_num in cursor:
             if persipubsub.database.bytes_to_int(pending_subscribers_num) == 0:
                 msgs_to_delete.add(key)
@@ -149,7 +233,7 @@ def _prune_dangling_messages_for(queue: '_Queue',
     with queue.env.begin(db=meta_db) as txn:
         cursor = txn.cursor()
 
-        timestamp_now = datetime.datetime.utcnow().timestamp()
+        timestamp_now = _now()
         for key, timestamp in cursor:
             if int(timestamp_now) - persipubsub.database.bytes_to_int(
                     timestamp) > queue.hwm.message_timeout:
@@ -171,6 +255,26 @@ def _prune_dangling_messages_for(queue: '_Queue',
                 txn.delete(key=key, db=sub_db)
 
 
+class _Handles:
+    """Hold the handles of the queue's databases which are opened only once."""
+
+    def __init__(self, data_db: Any, pending_db: Any, meta_db: Any,
+                 subscriber_keys: List[bytes]) -> None:
+        """
+        Initialize with the given values.
+
+        :param data_db: handle of the database with the messages
+        :param pending_db:
+            handle of the database with the number of pending subscribers
+        :param meta_db: handle of the database with the publishing times
+        :param subscriber_keys: names of the subscriber databases, encoded
+        """
+        self.data_db = data_db
+        self.pending_db = pending_db
+        self.meta_db = meta_db
+        self.subscriber_keys = subscriber_keys
+
+
 class _Queue:
     """
     Represent a message queue.
@@ -200,6 +304,8 @@ class _Queue:
         self.strategy = None  # type: Optional[Strategy]
         self.subscriber_ids = None  # type: Optional[Set[str]]
         self.closed = False
+        self._handles = _Handles(
+            data_db=None, pending_db=None, meta_db=None, subscriber_keys=[])
 
     def __enter__(self) -> '_Queue':
         """Enter the context and give the queue prepared in the constructor."""
@@ -237,12 +343,14 @@ class _Queue:
                 max_db_num=persipubsub.database.DEFAULT_MAX_DB_NUM,
                 max_db_size_bytes=persipubsub.database.DEFAULT_MAX_DB_SIZE)
 
+        # The handles are opened in a write transaction so that they stay
+        # valid for all later transactions on the environment.
         with self.env.begin(write=True) as txn:
-            _ = self.env.open_db(
+            data_db = self.env.open_db(
                 key=persipubsub.database.DATA_DB, txn=txn, create=True)
-            _ = self.env.open_db(
+            pending_db = self.env.open_db(
                 key=persipubsub.database.PENDING_DB, txn=txn, create=True)
-            _ = self.env.open_db(
+            meta_db = self.env.open_db(
                 key=persipubsub.database.META_DB, txn=txn, create=True)
             _ = self.env.open_db(
                 key=persipubsub.database.QUEUE_DB, txn=txn, create=True)
@@ -259,54 +367,50 @@ class _Queue:
         self.strategy = _parse_strategy(identifier=queue_data.strategy)
 
         self.subscriber_ids = queue_data.subscriber_ids
+        self._handles = _Handles(
+            data_db=data_db,
+            pending_db=pending_db,
+            meta_db=meta_db,
+            subscriber_keys=[
+                persipubsub.database.str_to_bytes(sub)
+                for sub in self.subscriber_ids
+            ])
 
     @icontract.require(lambda self: not self.closed)
-    def put(self, msg: bytes) -> None:
+    def put(self, msg: Union[bytes, bytearray, memoryview]) -> None:
         """
         Put message to LMDB in one transaction.
 
-        :param msg: message in bytes
+        :param msg:
+            message in bytes or in any other bytes-like object. It is written
+            to LMDB directly so that reused buffers need not be copied first.
         :return:
         """
         # every publisher always prunes queue before sending a message.
         self.cleanup()
-        msg_id = str(datetime.datetime.utcnow().timestamp()) + str(uuid.uuid4())
+        msg_id = _new_msg_id()
         assert self.env is not None
         assert self.subscriber_ids is not None
         with self.env.begin(write=True) as txn:
-            pending_db = self.env.open_db(
-                key=persipubsub.database.PENDING_DB, txn=txn, create=False)
             txn.put(
-                key=persipubsub.database.str_to_bytes(msg_id),
+                key=msg_id,
                 value=persipubsub.database.int_to_bytes(
                     len(self.subscriber_ids)),
-                db=pending_db)
+                db=self._handles.pending_db)
 
-            meta_db = self.env.open_db(
-                key=persipubsub.database.META_DB, txn=txn, create=False)
             txn.put(
-                key=persipubsub.database.str_to_bytes(msg_id),
-                value=persipubsub.database.int_to_bytes(
-                    int(datetime.datetime.utcnow().timestamp())),
-                db=meta_db)
+                key=msg_id,
+                value=persipubsub.database.int_to_bytes(int(_now())),
+                db=self._handles.meta_db)
 
-            data_db = self.env.open_db(
-                key=persipubsub.database.DATA_DB, txn=txn, create=False)
-            txn.put(
-                key=persipubsub.database.str_to_bytes(msg_id),
-                value=msg,
-                db=data_db)
+            txn.put(key=msg_id, value=msg, db=self._handles.data_db)
 
-            for sub in self.subscriber_ids:
-                sub_db = self.env.open_db(
-                    key=persipubsub.database.str_to_bytes(sub),
-                    txn=txn,
-                    create=False)
-                txn.put(
-                    key=persipubsub.database.str_to_bytes(msg_id), db=sub_db)
+            for sub_key in self._handles.subscriber_keys:
+                sub_db = self.env.open_db(key=sub_key, txn=txn, create=False)
+                txn.put(key=msg_id, db=sub_db)
 
     @icontract.require(lambda self: not self.closed)
-    def put_many_flush_once(self, msgs: List[bytes]) -> None:
+    def put_many_flush_once(self, msgs: Iterable[bytes]) -> None:
         """
         Put multiple message to LMDB in one transaction.
 
@@ -318,74 +422,55 @@ class _Queue:
         assert self.env is not None
         assert self.subscriber_ids is not None
         with self.env.begin(write=True) as txn:
-
-            pending_db = self.env.open_db(
-                key=persipubsub.database.PENDING_DB, txn=txn, create=False)
-
-            meta_db = self.env.open_db(
-                key=persipubsub.database.META_DB, txn=txn, create=False)
-
-            data_db = self.env.open_db(
-                key=persipubsub.database.DATA_DB, txn=txn, create=False)
-
             sub_dbs = set()  # type: Set[lmdb.Environment]
-            for sub in self.subscriber_ids:
+            for sub_key in self._handles.subscriber_keys:
                 sub_dbs.add(
-                    self.env.open_db(
-                        key=persipubsub.database.str_to_bytes(sub),
-                        txn=txn,
-                        create=False))
+                    self.env.open_db(key=sub_key, txn=txn, create=False))
 
             for msg in msgs:
-                msg_id = str(datetime.datetime.utcnow().timestamp()) + str(
-                    uuid.uuid4())
+                msg_id = _new_msg_id()
 
                 txn.put(
-                    key=persipubsub.database.str_to_bytes(msg_id),
+                    key=msg_id,
                     value=persipubsub.database.int_to_bytes(
                         len(self.subscriber_ids)),
-                    db=pending_db)
+                    db=self._handles.pending_db)
 
                 txn.put(
-                    key=persipubsub.database.str_to_bytes(msg_id),
-                    value=persipubsub.database.int_to_bytes(
-                        int(datetime.datetime.utcnow().timestamp())),
-                    db=meta_db)
+                    key=msg_id,
+                    value=persipubsub.database.int_to_bytes(int(_now())),
+                    db=self._handles.meta_db)
 
-                txn.put(
-                    key=persipubsub.database.str_to_bytes(msg_id),
-                    value=msg,
-                    db=data_db)
+                txn.put(key=msg_id, value=msg, db=self._handles.data_db)
 
                 for sub_db in sub_dbs:
-                    txn.put(
-                        key=persipubsub.database.str_to_bytes(msg_id),
-                        db=sub_db)
+                    txn.put(key=msg_id, db=sub_db)
 
     @icontract.require(lambda self: not self.closed)
-    def front(self, sub_id: str) -> Tuple[Optional[bytes], Optional[bytes]]:
+    def front(self, sub_id: str, sub_db: Optional[Any] = None
+              ) -> Tuple[Optional[bytes], Optional[bytes]]:
         """
         Peek at next message in LMDB.
 
         Load from LMDB into memory and process msg afterwards.
 
         :param sub_id: Subscriber ID
+        :param sub_db: already opened database of the subscriber, if available
         :return:
         """
         assert self.env is not None
         with self.env.begin(write=False) as txn:
-            sub_db = self.env.open_db(
-                key=persipubsub.database.str_to_bytes(sub_id),
-                txn=txn,
-                create=False)
-            data_db = self.env.open_db(
-                key=persipubsub.database.DATA_DB, txn=txn, create=False)
+            if sub_db is None:
+                sub_db = self.env.open_db(
+                    key=persipubsub.database.str_to_bytes(sub_id),
+                    txn=txn,
+                    create=False)
 
             cursor = txn.cursor(db=sub_db)
             # check if database is not empty
             if cursor.first():
                 key = cursor.key()
-                msg = txn.get(key=key, db=data_db)
+                msg = txn.get(key=key, db=self._handles.data_db)
             else:
                 key = None
                 msg = None
@@ -393,31 +478,128 @@ class _Queue:
         return key, msg
 
     @icontract.require(lambda self: not self.closed)
-    def pop(self, sub_id: str, msg_id: Optional[bytes] = None) -> None:
+    @contextlib.contextmanager
+    def front_view(self, sub_id: str, sub_db: Optional[Any] = None
+                   ) -> Iterator[Tuple[Optional[bytes], Optional[memoryview]]]:
+        """
+        Peek at next message in LMDB without copying it out of the map.
+
+        The message is a view into the memory map and is only valid inside the
+        context since it is bound to the read transaction.
+
+        :param sub_id: Subscriber ID
+        :param sub_db: already opened database of the subscriber, if available
+        :return: Iterator because of decorator which contains ID and message
+        """
+        assert self.env is not None
+        with self.env.begin(write=False, buffers=True) as txn:
+            if sub_db is None:
+                sub_db = self.env.open_db(
+                    key=persipubsub.database.str_to_bytes(sub_id),
+                    txn=txn,
+                    create=False)
+
+            cursor = txn.cursor(db=sub_db)
+            # check if database is not empty
+            if cursor.first():
+                key = bytes(cursor.key())
+                msg = txn.get(key=key, db=self._handles.data_db)
+            else:
+                key = None
+                msg = None
+
+            yield key, msg
+
+    @icontract.require(lambda self: not self.closed)
+    def pop(self,
+            sub_id: str,
+            msg_id: Optional[bytes] = None,
+            sub_db: Optional[Any] = None) -> None:
         """
         Remove msg from the subscriber's queue and reduce pending subscribers.
 
         :param sub_id: Subscriber ID
+        :param msg_id: message to pop; the oldest one if not given
+        :param sub_db: already opened database of the subscriber, if available
         :return:
         """
         assert self.env is not None
         with self.env.begin(write=True) as txn:
-            sub_db = self.env.open_db(
-                key=persipubsub.database.str_to_bytes(sub_id),
-                txn=txn,
-                create=False)
-            pending_db = self.env.open_db(
-                key=persipubsub.database.PENDING_DB, txn=txn, create=False)
+            if sub_db is None:
+                sub_db = self.env.open_db(
+                    key=persipubsub.database.str_to_bytes(sub_id),
+                    txn=txn,
+                    create=False)
+            pending_db = self._handles.pending_db
+
+            if msg_id is None:
+                cursor = txn.cursor(db=sub_db)
+                # check if database is not empty
+                if not cursor.first():
+                    raise RuntimeError("No message to pop")
+
+                key = cursor.key()
+                cursor.delete()
+            else:
+                # The subscriber already knows the message, so it is deleted
+                # directly without positioning a cursor at the front first.
+                # LMDB never stores empty keys and refuses to look them up.
+                key = msg_id
+                if not key or not txn.delete(key=key, db=sub_db):
+                    raise RuntimeError("No message to pop")
+
+            pending_value = txn.get(key=key, db=pending_db)
+            pending_num = persipubsub.database.bytes_to_int(pending_value)
+            decreased_pending_num = pending_num - 1
+            assert decreased_pending_num >= 0
+            txn.put(
+                key=key,
+                value=persipubsub.database.int_to_bytes(decreased_pending_num),
+                db=pending_db)
+
+    @icontract.require(lambda self: not self.closed)
+    @icontract.require(lambda max_msg_num: max_msg_num > 0)
+    def pop_many(self,
+                 sub_id: str,
+                 max_msg_num: int,
+                 sub_db: Optional[Any] = None) -> List[bytes]:
+        """
+        Remove the oldest msgs from the subscriber's queue and return them.
+
+        The messages are read and popped in a single transaction.
+
+        :param sub_id: Subscriber ID
+        :param max_msg_num: maximal number of messages to pop
+        :param sub_db: already opened database of the subscriber, if available
+        :return: popped messages, oldest first
+        """
+        msgs = []  # type: List[bytes]
+        assert self.env is not None
+        with self.env.begin(write=True) as txn:
+            if sub_db is None:
+                sub_db = self.env.open_db(
+                    key=persipubsub.database.str_to_bytes(sub_id),
+                    txn=txn,
+                    create=False)
+            pending_db = self._handles.pending_db
+            data_db = self._handles.data_db
+
+            msg_to_pop_num = min(max_msg_num, txn.stat(db=sub_db)['entries'])
 
             cursor = txn.cursor(db=sub_db)
-            # check if database is not empty
-            if cursor.first():
-                if msg_id is None:
-                    key = cursor.key()
-                else:
-                    key = msg_id
+            if msg_to_pop_num <= 0 or not cursor.first():
+                return msgs
+
+            for _ in range(msg_to_pop_num):
+                key = cursor.key()
+                # delete() moves the cursor to the next message.
+                cursor.delete()
+
+                msg = txn.get(key=key, db=data_db)
+                # Messages are pruned from all databases at once.
+                assert msg is not None
+                msgs.append(msg)
 
-                cursor.pop(key=key)
                 pending_value = txn.get(key=key, db=pending_db)
                 pending_num = persipubsub.database.bytes_to_int(pending_value)
                 decreased_pending_num = pending_num - 1
@@ -427,8 +609,59 @@ class _Queue:
                     value=persipubsub.database.int_to_bytes(
                         decreased_pending_num),
                     db=pending_db)
-            else:
-                raise RuntimeError("No message to pop")
+
+        return msgs
+
+    @icontract.require(lambda self: not self.closed)
+    def pop_all_but_last(self, sub_id: str,
+                         sub_db: Optional[Any] = None) -> None:
+        """
+        Remove all msgs except the most recent one from the subscriber's queue.
+
+        All messages are popped in a single transaction instead of one
+        transaction per message. Rather than deleting the messages one by one,
+        the subscriber's database is emptied at once and the most recent
+        message is put back.
+
+        :param sub_id: Subscriber ID
+        :param sub_db: already opened database of the subscriber, if available
+        :return:
+        """
+        assert self.env is not None
+        with self.env.begin(write=True) as txn:
+            if sub_db is None:
+                sub_db = self.env.open_db(
+                    key=persipubsub.database.str_to_bytes(sub_id),
+                    txn=txn,
+                    create=False)
+            pending_db = self._handles.pending_db
+
+            cursor = txn.cursor(db=sub_db)
+            if not cursor.last():
+                return
+            tail_key = cursor.key()
+            tail_value = bytes(cursor.value())
+
+            cursor.first()
+            if cursor.key() == tail_key:
+                return
+
+            for key in cursor.iternext(keys=True, values=False):
+                if key == tail_key:
+                    break
+
+                pending_value = txn.get(key=key, db=pending_db)
+                pending_num = persipubsub.database.bytes_to_int(pending_value)
+                decreased_pending_num = pending_num - 1
+                assert decreased_pending_num >= 0
+                txn.put(
+                    key=key,
+                    value=persipubsub.database.int_to_bytes(
+                        decreased_pending_num),
+                    db=pending_db)
+
+            txn.drop(db=sub_db, delete=False)
+            txn.put(key=tail_key, value=tail_value, db=sub_db, append=True)
 
     @icontract.require(lambda self: not self.closed)
     def prune_dangling_messages(self) -> None:
@@ -457,9 +690,7 @@ class _Queue:
         lmdb_size_bytes = 0
         assert self.env is not None
         with self.env.begin(write=False) as txn:
-            data_db = self.env.open_db(
-                key=persipubsub.database.DATA_DB, txn=txn, create=False)
-            data_stat = txn.stat(db=data_db)
+            data_stat = txn.stat(db=self._handles.data_db)
             lmdb_size_bytes += data_stat['psize'] * (
                 data_stat['branch_pages'] + data_stat['leaf_pages'] +
                 data_stat['overflow_pages'])
@@ -475,9 +706,8 @@ class _Queue:
         """
         assert self.env is not None
         with self.env.begin(write=False) as txn:
-            meta_db = self.env.open_db(
-                key=persipubsub.database.META_DB, txn=txn, create=False)
-            meta_stat = txn.stat(db=meta_db)  # type: Dict[str, int]
+            meta_stat = txn.stat(
+                db=self._handles.meta_db)  # type: Dict[str, int]
 
         return meta_stat['entries']
 
@@ -515,15 +745,11 @@ class _Queue:
         messages_to_delete = set()  # type: Set[bytes]
         assert self.env is not None
         with self.env.begin(write=False) as txn:
-            meta_db = self.env.open_db(
-                key=persipubsub.database.META_DB, txn=txn, create=False)
-            meta_stat = txn.stat(db=meta_db)
+            meta_stat = txn.stat(db=self._handles.meta_db)
             entries = meta_stat['entries']
 
-            cursor = txn.cursor(db=meta_db)
+            cursor = txn.cursor(db=self._handles.meta_db)
             if self.strategy == Strategy.PRUNE_FIRST:
-
-                cursor.first()
                 for index, key in enumerate(
                         cursor.iternext(keys=True, values=False)):
                     messages_to_delete.add(key)
@@ -540,22 +766,14 @@ class _Queue:
             else:
                 raise RuntimeError("Pruning strategy not set.")
 
-        assert self.subscriber_ids is not None
         with self.env.begin(write=True) as txn:
-            pending_db = self.env.open_db(
-                key=persipubsub.database.PENDING_DB, txn=txn, create=False)
-            meta_db = self.env.open_db(
-                key=persipubsub.database.META_DB, txn=txn, create=False)
-            data_db = self.env.open_db(
-                key=persipubsub.database.DATA_DB, txn=txn, create=False)
-
-            dbs = [pending_db, meta_db, data_db]
+            dbs = [
+                self._handles.pending_db, self._handles.meta_db,
+                self._handles.data_db
+            ]
 
-            for sub in self.subscriber_ids:
-                sub_db = self.env.open_db(
-                    key=persipubsub.database.str_to_bytes(sub),
-                    txn=txn,
-                    create=False)
+            for sub_key in self._handles.subscriber_keys:
+                sub_db = self.env.open_db(key=sub_key, txn=txn, create=False)
                 dbs.append(sub_db)
 
             for key in messages_to_delete:
@@ -2,10 +2,9 @@
 """Receive messages persistently from the queue."""
 
 import contextlib
-import datetime
 import pathlib
 import time
-from typing import Any, Iterator, Optional, Union
+from typing import Any, Iterator, List, Optional, Tuple, Union
 
 import icontract
 import lmdb  # pylint: disable=unused-import
@@ -31,6 +30,10 @@ def initialize(path: pathlib.Path, env: lmdb.Environment,
     return subscriber
 
 
+# longest time between two checks of a waiting subscriber for a message (secs)
+_MAX_POLL_INTERVAL = 0.01
+
+
 class Subscriber:
     """
     Handle receiving messages stored in the queue.
@@ -64,6 +67,27 @@ class Subscriber:
         self.queue.init(path=path, env=env)
         assert self.queue is not None
 
+    @staticmethod
+    def _wait(timeout: int, retries: int, deadline: float) -> bool:
+        """
+        Wait before the next check for a message.
+
+        The subscriber checks at least retries times within the timeout, but
+        not less often than every _MAX_POLL_INTERVAL so that a message is
+        received soon after it was published.
+
+        :param timeout: time waiting for a message (secs)
+        :param retries: minimal number of checks for a message
+        :param deadline: monotonic time at which the waiting ends
+        :return: False if the deadline passed, True otherwise
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+
+        time.sleep(min(timeout / retries, _MAX_POLL_INTERVAL, remaining))
+        return True
+
     def __enter__(self) -> 'Subscriber':
         """Enter the context and give the sub prepared in the constructor."""
         return self
@@ -76,40 +100,123 @@ class Subscriber:
         """Close subscriber."""
         self.closed = True
 
+    def _poll(self, timeout: int,
+              retries: int) -> Tuple[Optional[bytes], Optional[bytes]]:
+        """
+        Wait until a message is available in the subscriber's queue.
+
+        :param timeout: time waiting for a message (secs)
+        :param retries: minimal number of checks if a msg arrived in the queue
+        :return: ID and content of the next message, or (None, None)
+        """
+        assert self.queue is not None
+        assert self.identifier is not None
+
+        deadline = time.monotonic() + timeout
+        while True:
+            msg_id, msg = self.queue.front(sub_id=self.identifier)
+            if msg is not None:
+                return msg_id, msg
+
+            if not self._wait(
+                    timeout=timeout, retries=retries, deadline=deadline):
+                return None, None
+
+    @contextlib.contextmanager
+    def _poll_view(self, timeout: int, retries: int
+                   ) -> Iterator[Tuple[Optional[bytes], Optional[memoryview]]]:
+        """
+        Wait until a message is available and give a view on it.
+
+        :param timeout: time waiting for a message (secs)
+        :param retries: minimal number of checks if a msg arrived in the queue
+        :return:
+            Iterator because of decorator which contains ID and a view on the
+            message, or (None, None)
+        """
+        assert self.queue is not None
+        assert self.identifier is not None
+
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.queue.front_view(sub_id=self.identifier) as (msg_id, msg):
+                if msg is not None:
+                    yield msg_id, msg
+                    return
+
+            if not self._wait(
+                    timeout=timeout, retries=retries, deadline=deadline):
+                yield None, None
+                return
+
     @icontract.require(lambda timeout: timeout > 0)
     @icontract.require(lambda retries: retries > 0)
     @icontract.require(lambda self: not self.closed)
     @contextlib.contextmanager
-    def receive(self, timeout: int = 60,
-                retries: int = 10) -> Iterator[Optional[bytes]]:
+    def receive(self,
+                timeout: int = 60,
+                retries: int = 10,
+                zero_copy: bool = False
+                ) -> Iterator[Optional[Union[bytes, memoryview]]]:
         """
         Receive messages from the queue.
 
         :param timeout:
             time waiting for a message. If none arrived until the timeout then
             None will be returned. (secs)
-        :param retries: number of tries to check if a msg arrived in the queue
+        :param retries: minimal number of checks if a msg arrived in the queue
+        :param zero_copy:
+            if set, the message is a memoryview into the queue which is valid
+            only inside the with block. Copy it with bytes() if you need to
+            keep it.
         :return:
             Iterator because of decorator which contains a message in bytes
         """
-        msg = None
-        msg_id = None
-        end = int(datetime.datetime.utcnow().timestamp()) + timeout
-        assert self.queue is not None
-        assert self.identifier is not None
-        try:
-            while int(datetime.datetime.utcnow().timestamp()) <= end:
-                msg_id, msg = self.queue.front(sub_id=self.identifier)
-                if msg is not None:
-                    break
-                time.sleep(timeout / retries)
+        msg_id = None  # type: Optional[bytes]
+        if zero_copy:
+            with self._poll_view(
+                    timeout=timeout, retries=retries) as (msg_id, view):
+                yield view
+        else:
+            msg_id, msg = self._poll(timeout=timeout, retries=retries)
             yield msg
-        finally:
-            pass
 
         if msg_id is not None:
             self._pop(msg_id=msg_id)
 
+    @icontract.require(lambda max_msg_num: max_msg_num > 0)
+    @icontract.require(lambda timeout: timeout > 0)
+    @icontract.require(lambda retries: retries > 0)
+    @icontract.require(lambda self: not self.closed)
+    def receive_many(self,
+                     max_msg_num: int,
+                     timeout: int = 60,
+                     retries: int = 10) -> List[bytes]:
+        """
+        Receive multiple messages from the queue at once.
+
+        In contrast to receive, the messages are popped before they are
+        returned. All of them are read and popped in a single transaction.
+
+        :param max_msg_num: maximal number of messages to receive
+        :param timeout:
+            time waiting for a message. If none arrived until the timeout then
+            an empty list will be returned. (secs)
+        :param retries: minimal number of checks if a msg arrived in the queue
+        :return: received messages, oldest first
+        """
+        # Only wait for a message here without copying it; pop_many reads it.
+        with self._poll_view(timeout=timeout, retries=retries) as (msg_id, _):
+            pass
+
+        if msg_id is None:
+            return []
+
+        assert self.queue is not None
+        assert self.identifier is not None
+        return self.queue.pop_many(
+            sub_id=self.identifier, max_msg_num=max_msg_num)
+
     def _pop(self, msg_id: bytes) -> None:
         """Pop a message from the subscriber's database."""
         assert self.queue is not None
@@ -135,37 +242,16 @@ class Subscriber:
         :param timeout:
             time waiting for a message. If none arrived until the timeout then
             None will be returned. (secs)
-        :param retries: number of tries to check if a msg arrived in the queue
+        :param retries: minimal number of checks if a msg arrived in the queue
         :return:
             Iterator because of decorator which contains a message in bytes
         """
         assert self.queue is not None
-        assert self.queue.env is not None
         assert self.identifier is not None
-        with self.queue.env.begin(write=False) as txn:
-            sub_db = self.queue.env.open_db(
-                key=persipubsub.database.str_to_bytes(self.identifier),
-                txn=txn,
-                create=False)
-            sub_stat = txn.stat(db=sub_db)
-            # pop all message except the most recent one
-            msg_to_pop_num = sub_stat['entries'] - 1
-
-        for _ in range(msg_to_pop_num):
-            self.queue.pop(sub_id=self.identifier)
-
-        msg = None
-        msg_id = None
-        end = int(datetime.datetime.utcnow().timestamp()) + timeout
-        try:
-            while int(datetime.datetime.utcnow().timestamp()) <= end:
-                msg_id, msg = self.queue.front(sub_id=self.identifier)
-                if msg is not None:
-                    break
-                time.sleep(timeout / retries)
-            yield msg
-        finally:
-            pass
+        self.queue.pop_all_but_last(sub_id=self.identifier)
+
+        msg_id, msg = self._poll(timeout=timeout, retries=retries)
+        yield msg
 
         if msg_id is not None:
             self._pop(msg_id=msg_id)
@@ -1,14 +1,38 @@
 #!/usr/bin/env python3
 """Test persipubsub."""
 
+import contextlib
+import os
 import unittest
+from typing import Optional, Set
 
 import lmdb
 import temppathlib
 
 import persipubsub
 # pylint: disable=missing-docstring
+# pylint: disable=protected-access
+import persipubsub.control
 import persipubsub.database
+import persipubsub.environment
+
+_SHM_DIR = '/dev/shm'
+
+
+def _tmp_root() -> Optional[str]:
+    """
+    Give the directory in which the test queues are created.
+
+    The queues are kept in memory unless the user chose a temporary directory.
+
+    :return: /dev/shm if usable, otherwise None for the default directory
+    """
+    if 'TMPDIR' not in os.environ and os.path.isdir(_SHM_DIR) and \
+            os.access(_SHM_DIR, os.W_OK):
+        return _SHM_DIR
+
+    return None
+
 
 LMDB_PAGE_SIZE = 4096
 
@@ -32,10 +56,83 @@ META_DB = "meta_db".encode(ENCODING)  # msg_id | metadata
 QUEUE_DB = "queue_db".encode(ENCODING)  # queue_pth | all queue data
 SUBSCRIBER_DB = "subscriber_db".encode(ENCODING)  # sub_id | -
 
+# define frequently used test keys and values here
+HELLO = "hello subscriber".encode(ENCODING)
+SUB_DB = "sub".encode(ENCODING)  # database of the subscriber 'sub'
+TIMEOUT_MSG_KEY = "timeout_msg".encode(ENCODING)
+VALID_MSG_KEY = "valid_msg".encode(ENCODING)
+POPPED_MSG_KEY = "popped_msg".encode(ENCODING)
+PENDING_ZERO = (0).to_bytes(length=BYTES_LENGTH, byteorder=BYTES_ORDER)
+PENDING_ONE = (1).to_bytes(length=BYTES_LENGTH, byteorder=BYTES_ORDER)
+MSG = "I'm a message.".encode(ENCODING)
+MSG_TOO = "I'm a message too".encode(ENCODING)
+SECRET_MSGS = tuple("secret message {}".format(index).encode(ENCODING)
+                    for index in range(TEST_HWM_MSG_NUM + 1))
+FILLER_MSG = ("a" * (LMDB_PAGE_SIZE // 4)).encode(ENCODING)
+
+
+class QueueTestCase(unittest.TestCase):
+    """
+    Share one queue, initialized with the test subscribers, among the tests.
+
+    The queue is created once per test class and emptied before each test.
+    """
+
+    #: subscribers of the queue
+    subscriber_ids = {'sub'}  # type: Set[str]
+
+    _exit_stack = None  # type: Optional[contextlib.ExitStack]
+    _env = None  # type: Optional[persipubsub.environment.Environment]
+    _control = None  # type: Optional[persipubsub.control.Control]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+
+        with contextlib.ExitStack() as exit_stack:
+            tmp_dir = exit_stack.enter_context(
+                temppathlib.TemporaryDirectory(base_tmp_dir=_tmp_root()))
+            cls._env = exit_stack.enter_context(
+                persipubsub.environment.initialize(path=tmp_dir.path))
+            cls._control = cls._env.new_control(
+                subscriber_ids=cls.subscriber_ids)
+
+            cls._exit_stack = exit_stack.pop_all()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        assert cls._exit_stack is not None
+        cls._exit_stack.close()
+
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        assert self._env is not None and self._control is not None
+        self.env = self._env
+        self.control = self._control
+
+        # Empty the databases of the queue, but keep them and their handles.
+        queue = self.control.queue
+        assert queue is not None and queue.env is not None
+        with queue.env.begin(write=True) as txn:
+            for db in [
+                    queue._handles.data_db, queue._handles.pending_db,
+                    queue._handles.meta_db
+            ]:
+                txn.drop(db=db, delete=False)
+
+            for sub_id in sorted(self.subscriber_ids):
+                sub_db = queue.env.open_db(
+                    key=persipubsub.database.str_to_bytes(sub_id),
+                    txn=txn,
+                    create=False)
+                txn.drop(db=sub_db, delete=False)
+
 
 class TestPersiPubSub(unittest.TestCase):
     def test_get_data(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=_tmp_root()) as tmp_dir:
             env = lmdb.open(path=tmp_dir.path.as_posix(), max_dbs=2)
 
             with env.begin(write=True) as txn:
@@ -70,6 +167,10 @@ class TestPersiPubSub(unittest.TestCase):
         self.assertEqual("prune_last", queue_data.strategy)
         self.assertEqual([], queue_data.subscriber_ids)
 
+    def test_bytes_to_int_from_view(self) -> None:
+        self.assertEqual(
+            1, persipubsub.database.bytes_to_int(memoryview(PENDING_ONE)))
+
 
 if __name__ == '__main__':
     unittest.main()
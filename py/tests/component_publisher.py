@@ -1,23 +1,73 @@
 #!/usr/bin/env python
 """Publisher component for live test."""
 
+import itertools
 import pathlib
+import queue as stdlib_queue
+import threading
+from typing import Dict, Tuple
 
 import persipubsub.environment
+import persipubsub.publisher
+import persipubsub.queue
+import tests
 
 # pylint: disable=missing-docstring
 
+PAYLOAD = tests.HELLO
 
-def send_thread(env: persipubsub.environment.Environment, num_msg: int) -> None:
-    pub = env.new_publisher()
+# number of messages committed in one transaction by send_process; well
+# below the number of messages of a live test so that the publishers still
+# commit many times under contention
+BATCH_SIZE = 8
 
-    for _ in range(num_msg):
-        pub.send(msg="hello subscriber".encode('utf-8'))
+# Environment opened by send_process, kept open in the (pooled) worker process
+# so that repeated sends to the same queue map the LMDB files only once. Every
+# test uses its own queue, so the environment of the previous queue is closed
+# as soon as a send to another queue comes in. The environments are keyed by
+# the path and the durability of the queue.
+_EnvKey = Tuple[pathlib.Path, persipubsub.queue.Durability]
+_ENV_CACHE = {}  # type: Dict[_EnvKey, persipubsub.environment.Environment]
+_ENV_CACHE_LOCK = threading.Lock()
+
+
+def _cached_env(path: pathlib.Path, durability: persipubsub.queue.Durability
+                ) -> persipubsub.environment.Environment:
+    with _ENV_CACHE_LOCK:
+        env = _ENV_CACHE.get((path, durability))
+        if env is None:
+            for other_env in _ENV_CACHE.values():
+                other_env.close()
+            _ENV_CACHE.clear()
+
+            env = persipubsub.environment.Environment(
+                path=path, durability=durability)
+            _ENV_CACHE[(path, durability)] = env
 
+        return env
 
-def send_process(path: pathlib.Path, num_msg: int) -> None:
-    env = persipubsub.environment.Environment(path=path)
-    pub = env.new_publisher()
 
+def send_thread(env: persipubsub.environment.Environment, num_msg: int) -> None:
+    # Sends every message on its own to exercise the per-message publish path
+    # under contention.
+    pub = env.get_or_create_publisher()
     for _ in range(num_msg):
-        pub.send(msg="hello subscriber".encode('utf-8'))
+        pub.send(msg=PAYLOAD)
+
+
+def send_pooled(pool: 'stdlib_queue.Queue[persipubsub.publisher.Publisher]',
+                num_msg: int) -> None:
+    pub = pool.get()
+    try:
+        pub.send_many(msgs=[PAYLOAD] * num_msg)
+    finally:
+        pool.put(pub)
+
+
+def send_process(path: pathlib.Path,
+                 num_msg: int,
+                 durability: persipubsub.queue.Durability = persipubsub.queue.
+                 Durability.ASYNC) -> None:
+    pub = _cached_env(path=path, durability=durability).new_publisher()
+    pub.send_many(
+        msgs=itertools.repeat(PAYLOAD, num_msg), batch_size=BATCH_SIZE)
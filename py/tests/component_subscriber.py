@@ -2,62 +2,72 @@
 """Subscriber component for live test."""
 
 import pathlib
+import threading
 import time
+from typing import Any
 
 import persipubsub.environment
+import persipubsub.queue
+import persipubsub.subscriber
 
 # pylint: disable=missing-docstring
 
 
+def receive_all(sub: persipubsub.subscriber.Subscriber, num_msg: int,
+                timeout: int, retries: int, method_timeout: int) -> None:
+    deadline = time.monotonic() + method_timeout
+
+    received_msg = 0
+    while received_msg < num_msg:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError
+
+        received_msg += len(
+            sub.receive_many(
+                max_msg_num=num_msg - received_msg,
+                timeout=max(1, min(timeout, int(remaining))),
+                retries=retries))
+
+
 # pylint: disable=too-many-arguments
-def receive_thread(path: pathlib.Path,
-                   env: persipubsub.environment.Environment,
+def receive_thread(env: persipubsub.environment.Environment,
                    identifier: str,
                    num_msg: int,
+                   result: threading.Event,
                    timeout: int = 2,
                    retries: int = 10,
                    method_timeout: int = 10) -> None:
-    sub = env.new_subscriber(identifier=identifier)
+    sub = env.get_or_create_subscriber(identifier=identifier)
 
-    received_msg = 0
-
-    start = time.time()
-    while True:
-        if received_msg == num_msg:
-            break
-        elif time.time() - start >= method_timeout:
-            raise TimeoutError
-        else:
-            with sub.receive(timeout=timeout, retries=retries) as msg:
-                if msg is not None:
-                    received_msg += 1
+    receive_all(
+        sub=sub,
+        num_msg=num_msg,
+        timeout=timeout,
+        retries=retries,
+        method_timeout=method_timeout)
 
-    result = path / identifier
-    result.write_text('pass')
+    result.set()
 
 
 # pylint: disable=too-many-arguments
 def receive_process(path: pathlib.Path,
                     identifier: str,
                     num_msg: int,
+                    result: Any,
                     timeout: int = 2,
                     retries: int = 10,
-                    method_timeout: int = 60) -> None:
-    env = persipubsub.environment.Environment(path=path)
+                    method_timeout: int = 60,
+                    durability: persipubsub.queue.Durability = persipubsub.
+                    queue.Durability.ASYNC) -> None:
+    env = persipubsub.environment.Environment(path=path, durability=durability)
     sub = env.new_subscriber(identifier=identifier)
 
-    received_msg = 0
-
-    start = time.time()
-    while True:
-        if received_msg == num_msg:
-            break
-        elif time.time() - start >= method_timeout:
-            raise TimeoutError
-        else:
-            with sub.receive(timeout=timeout, retries=retries) as msg:
-                if msg is not None:
-                    received_msg += 1
+    receive_all(
+        sub=sub,
+        num_msg=num_msg,
+        timeout=timeout,
+        retries=retries,
+        method_timeout=method_timeout)
 
-    result = path / identifier
-    result.write_text('pass')
+    result.value = 1
@@ -1,10 +1,9 @@
 #!/usr/bin/env python
 """Test control unit."""
 
-import datetime
 import pathlib
 import unittest
-from typing import List, Set
+from typing import Set
 
 import temppathlib
 
@@ -27,27 +26,25 @@ def setup(path: pathlib.Path, sub_set: Set[str]) -> persipubsub.control.Control:
 
 class TestControl(unittest.TestCase):
     def test_initialize_all(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             control = setup(path=tmp_dir.path, sub_set={'sub'})
 
+            # the main database lists its keys in sorted order
             expected_db_keys = [
-                b'data_db', b'meta_db', b'pending_db', b'queue_db',
-                b'subscriber_db', b'sub'
+                b'data_db', b'meta_db', b'pending_db', b'queue_db', b'sub',
+                b'subscriber_db'
             ]
-            db_keys = []  # type: List[bytes]
-
             assert control.queue is not None
             assert control.queue.env is not None
             with control.queue.env.begin() as txn:
-                cursor = txn.cursor()
-                cursor.first()
-                for key, value in cursor:  # pylint: disable=unused-variable
-                    db_keys.append(key)
+                db_keys = list(txn.cursor().iternext(keys=True, values=False))
 
-            self.assertListEqual(sorted(expected_db_keys), sorted(db_keys))
+            self.assertListEqual(expected_db_keys, db_keys)
 
     def test_del_sub(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             control = setup(path=tmp_dir.path, sub_set={"sub1", "sub2"})
 
             assert control.queue is not None
@@ -56,21 +53,17 @@ class TestControl(unittest.TestCase):
             control._remove_sub(sub_id="sub2")
 
             expected_db_keys = [
-                b'data_db', b'meta_db', b'pending_db', b'queue_db',
-                b'subscriber_db', b'sub1'
+                b'data_db', b'meta_db', b'pending_db', b'queue_db', b'sub1',
+                b'subscriber_db'
             ]
-            db_keys = []  # type: List[bytes]
-
             with control.queue.env.begin() as txn:
-                cursor = txn.cursor()
-                cursor.first()
-                for key, value in cursor:  # pylint: disable=unused-variable
-                    db_keys.append(key)
+                db_keys = list(txn.cursor().iternext(keys=True, values=False))
 
-            self.assertListEqual(sorted(expected_db_keys), sorted(db_keys))
+            self.assertListEqual(expected_db_keys, db_keys)
 
     def test_clear_all_subs(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             control = setup(path=tmp_dir.path, sub_set={"sub1", "sub2"})
 
             control.clear_all_subscribers()
@@ -79,21 +72,17 @@ class TestControl(unittest.TestCase):
                 b'data_db', b'meta_db', b'pending_db', b'queue_db',
                 b'subscriber_db'
             ]
-            db_keys = []  # type: List[bytes]
-
             assert control.queue is not None
             assert control.queue.env is not None
             with control.queue.env.begin() as txn:
-                cursor = txn.cursor()
-                cursor.first()
-                for key, value in cursor:  # pylint: disable=unused-variable
-                    db_keys.append(key)
+                db_keys = list(txn.cursor().iternext(keys=True, values=False))
 
-            self.assertListEqual(sorted(expected_db_keys), sorted(db_keys))
+            self.assertListEqual(expected_db_keys, db_keys)
 
     def test_prune_dangling_messages(self) -> None:
         # pylint: disable=too-many-locals
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             control = setup(path=tmp_dir.path, sub_set={"sub"})
 
             assert control.queue is not None
@@ -101,69 +90,35 @@ class TestControl(unittest.TestCase):
             assert control.queue.hwm is not None
             control.queue.hwm.message_timeout = tests.TEST_MSG_TIMEOUT
 
-            with control.queue.env.begin(write=True) as txn:
-                sub_db = control.queue.env.open_db(
-                    key='sub'.encode(tests.ENCODING), txn=txn, create=False)
-
-                txn.put(key="timeout_msg".encode(tests.ENCODING), db=sub_db)
-                txn.put(key="valid_msg".encode(tests.ENCODING), db=sub_db)
-            with control.queue.env.begin(write=True) as txn:
-                data_db = control.queue.env.open_db(
-                    key=tests.DATA_DB, txn=txn, create=False)
-
-                txn.put(
-                    key="popped_msg".encode(tests.ENCODING),
-                    value="I'm data".encode(tests.ENCODING),
-                    db=data_db)
-                txn.put(
-                    key="timeout_msg".encode(tests.ENCODING),
-                    value="I'm data too".encode(tests.ENCODING),
-                    db=data_db)
-                txn.put(
-                    key="valid_msg".encode(tests.ENCODING),
-                    value="Free me!".encode(tests.ENCODING),
-                    db=data_db)
-            with control.queue.env.begin(write=True) as txn:
-                pending_db = control.queue.env.open_db(
-                    key=tests.PENDING_DB, txn=txn, create=False)
-
-                txn.put(
-                    key="popped_msg".encode(tests.ENCODING),
-                    value=int(0).to_bytes(
-                        length=tests.BYTES_LENGTH, byteorder=tests.BYTES_ORDER),
-                    db=pending_db)
-                txn.put(
-                    key="timeout_msg".encode(tests.ENCODING),
-                    value=int(1).to_bytes(
-                        length=tests.BYTES_LENGTH, byteorder=tests.BYTES_ORDER),
-                    db=pending_db)
-                txn.put(
-                    key="valid_msg".encode(tests.ENCODING),
-                    value=int(1).to_bytes(
-                        length=tests.BYTES_LENGTH, byteorder=tests.BYTES_ORDER),
-                    db=pending_db)
+            now = int(persipubsub.queue._now())
+            now_bytes = now.to_bytes(
+                length=tests.BYTES_LENGTH, byteorder=tests.BYTES_ORDER)
+            timed_out_bytes = (now - tests.TEST_MSG_TIMEOUT - 5).to_bytes(
+                length=tests.BYTES_LENGTH, byteorder=tests.BYTES_ORDER)
 
             with control.queue.env.begin(write=True) as txn:
-                meta_db = control.queue.env.open_db(
-                    key=tests.META_DB, txn=txn, create=False)
-
-                txn.put(
-                    key="popped_msg".encode(tests.ENCODING),
-                    value=int(datetime.datetime.utcnow().timestamp()).to_bytes(
-                        length=tests.BYTES_LENGTH, byteorder=tests.BYTES_ORDER),
-                    db=meta_db)
-                txn.put(
-                    key="timeout_msg".encode(tests.ENCODING),
-                    value=int(datetime.datetime.utcnow().timestamp() -
-                              tests.TEST_MSG_TIMEOUT - 5).to_bytes(
-                                  length=tests.BYTES_LENGTH,
-                                  byteorder=tests.BYTES_ORDER),
-                    db=meta_db)
-                txn.put(
-                    key="valid_msg".encode(tests.ENCODING),
-                    value=int(datetime.datetime.utcnow().timestamp()).to_bytes(
-                        length=tests.BYTES_LENGTH, byteorder=tests.BYTES_ORDER),
-                    db=meta_db)
+                sub_db = control.queue.env.open_db(
+                    key=tests.SUB_DB, txn=txn, create=False)
+                data_db = control.queue._handles.data_db
+                pending_db = control.queue._handles.pending_db
+                meta_db = control.queue._handles.meta_db
+
+                # the pairs are sorted by key
+                txn.cursor(db=sub_db).putmulti([(tests.TIMEOUT_MSG_KEY, b''),
+                                                (tests.VALID_MSG_KEY, b'')])
+                txn.cursor(db=data_db).putmulti(
+                    [(tests.POPPED_MSG_KEY, "I'm data".encode(tests.ENCODING)),
+                     (tests.TIMEOUT_MSG_KEY,
+                      "I'm data too".encode(tests.ENCODING)),
+                     (tests.VALID_MSG_KEY, "Free me!".encode(tests.ENCODING))])
+                txn.cursor(db=pending_db).putmulti(
+                    [(tests.POPPED_MSG_KEY, tests.PENDING_ZERO),
+                     (tests.TIMEOUT_MSG_KEY, tests.PENDING_ONE),
+                     (tests.VALID_MSG_KEY, tests.PENDING_ONE)])
+                txn.cursor(db=meta_db).putmulti(
+                    [(tests.POPPED_MSG_KEY, now_bytes),
+                     (tests.TIMEOUT_MSG_KEY, timed_out_bytes),
+                     (tests.VALID_MSG_KEY, now_bytes)])
 
             control.prune_dangling_messages()
 
@@ -173,31 +128,30 @@ class TestControl(unittest.TestCase):
             remaining_entries = 0
 
             # pylint: disable=invalid-name
-            for db in dbs:
-                with control.queue.env.begin(db=db) as txn:
-                    cursor = txn.cursor()
-                    cursor.first()
-                    for key, value in cursor:  # pylint: disable=unused-variable
+            # the keys are only compared inside the transaction, so they are
+            # read as views into the map instead of copies.
+            with control.queue.env.begin(write=False, buffers=True) as txn:
+                for db in dbs:
+                    for key in txn.cursor(db=db).iternext(
+                            keys=True, values=False):
                         remaining_entries += 1
-                        self.assertEqual(b'valid_msg', key)
+                        self.assertEqual(tests.VALID_MSG_KEY, key)
 
             self.assertEqual(expected_remaining_entries, remaining_entries)
 
     def test_prune_all_messages_for_subscriber(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             control = setup(path=tmp_dir.path, sub_set={"sub"})
 
             msg = persipubsub.database.str_to_bytes("hello world!")
             assert control.queue is not None
             assert control.queue.env is not None
-            control.queue.put(msg=msg)
-            control.queue.put(msg=msg)
+            control.queue.put_many_flush_once(msgs=[msg, msg])
 
             with control.queue.env.begin(write=False) as txn:
                 sub_db = control.queue.env.open_db(
-                    key=persipubsub.database.str_to_bytes('sub'),
-                    txn=txn,
-                    create=False)
+                    key=tests.SUB_DB, txn=txn, create=False)
                 sub_stat = txn.stat(db=sub_db)
                 self.assertEqual(2, sub_stat['entries'])
 
@@ -205,26 +159,27 @@ class TestControl(unittest.TestCase):
 
             with control.queue.env.begin(write=False) as txn:
                 sub_db = control.queue.env.open_db(
-                    key=persipubsub.database.str_to_bytes('sub'),
-                    txn=txn,
-                    create=False)
+                    key=tests.SUB_DB, txn=txn, create=False)
                 sub_stat = txn.stat(db=sub_db)
                 self.assertEqual(0, sub_stat['entries'])
 
     def test_is_initialized(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             control = setup(path=tmp_dir.path, sub_set={"sub"})
 
             self.assertTrue(control.is_initialized())
 
     def test_is_not_initialized(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             env = persipubsub.environment.initialize(path=tmp_dir.path)
             control = persipubsub.control.Control(tmp_dir.path, env=env._env)
             self.assertFalse(control.is_initialized())
 
     def test_nonexisting_remove_sub(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             control = setup(path=tmp_dir.path, sub_set={"sub1"})
             self.assertTrue(control.is_initialized())
             control._remove_sub("sub2")
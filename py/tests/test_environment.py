@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 """Test environment."""
 
+import threading
 import unittest
 
 import temppathlib
@@ -10,38 +11,125 @@ import persipubsub.environment
 import persipubsub.publisher
 import persipubsub.queue
 import persipubsub.subscriber
+import tests
 
 # pylint: disable=missing-docstring
 # pylint: disable=protected-access
 
 
-class TestEnvironment(unittest.TestCase):
+class TestEnvironment(tests.QueueTestCase):
+    subscriber_ids = {'sub', 'other_sub'}
+
     def test_new_environment(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.initialize(path=tmp_dir.path)
-            self.assertIsInstance(env, persipubsub.environment.Environment)
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
+            with persipubsub.environment.initialize(path=tmp_dir.path) as env:
+                self.assertIsInstance(env, persipubsub.environment.Environment)
+
+    def test_durability(self) -> None:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
+            with persipubsub.environment.initialize(path=tmp_dir.path) as env:
+                flags = env._env.flags()
+                self.assertTrue(flags['sync'])
+                self.assertTrue(flags['metasync'])
+                self.assertFalse(flags['writemap'])
+
+            with persipubsub.environment.initialize(
+                    path=tmp_dir.path,
+                    durability=persipubsub.queue.Durability.NOSYNC) as env:
+                flags = env._env.flags()
+                self.assertFalse(flags['sync'])
+                self.assertFalse(flags['metasync'])
+                self.assertFalse(flags['writemap'])
+
+            with persipubsub.environment.initialize(
+                    path=tmp_dir.path,
+                    durability=persipubsub.queue.Durability.ASYNC) as env:
+                flags = env._env.flags()
+                self.assertFalse(flags['sync'])
+                self.assertTrue(flags['writemap'])
+                self.assertTrue(flags['map_async'])
+
+    def test_max_db_size(self) -> None:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
+            with persipubsub.environment.initialize(
+                    path=tmp_dir.path,
+                    max_db_size_bytes=tests.TEST_MAX_DB_SIZE) as env:
+                self.assertEqual(tests.TEST_MAX_DB_SIZE,
+                                 env._env.info()['map_size'])
 
     def test_new_control(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.initialize(path=tmp_dir.path)
-            ctl = env.new_control()
-            self.assertIsInstance(ctl, persipubsub.control.Control)
+        ctl = self.env.new_control()
+        self.assertIsInstance(ctl, persipubsub.control.Control)
 
     def test_new_publisher(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.initialize(path=tmp_dir.path)
-            ctl = env.new_control()
-            ctl.init()
-            pub = env.new_publisher()
-            self.assertIsInstance(pub, persipubsub.publisher.Publisher)
+        pub = self.env.new_publisher()
+        self.assertIsInstance(pub, persipubsub.publisher.Publisher)
 
     def test_new_subscriber(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.initialize(path=tmp_dir.path)
-            ctl = env.new_control()
-            ctl.init()
-            sub = env.new_subscriber(identifier="sub")
-            self.assertIsInstance(sub, persipubsub.subscriber.Subscriber)
+        sub = self.env.new_subscriber(identifier="sub")
+        self.assertIsInstance(sub, persipubsub.subscriber.Subscriber)
+
+    def test_get_or_create_publisher(self) -> None:
+        env = self.env
+
+        pub = env.get_or_create_publisher()
+        self.assertIs(pub, env.get_or_create_publisher())
+        self.assertIsNot(pub, env.get_or_create_publisher(autosync=True))
+
+        other_pubs = []
+        thread = threading.Thread(
+            target=lambda: other_pubs.append(env.get_or_create_publisher()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(pub, other_pubs[0])
+
+        pub.close()
+        self.assertIsNot(pub, env.get_or_create_publisher())
+
+    def test_get_or_create_subscriber(self) -> None:
+        env = self.env
+
+        sub = env.get_or_create_subscriber(identifier="sub")
+        self.assertIs(sub, env.get_or_create_subscriber(identifier="sub"))
+        self.assertIsNot(sub,
+                         env.get_or_create_subscriber(identifier="other_sub"))
+
+    def test_close_closes_handed_out_components(self) -> None:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
+            with persipubsub.environment.initialize(path=tmp_dir.path) as env:
+                env.new_control(subscriber_ids={"sub"})
+
+                pub = env.get_or_create_publisher()
+                sub = env.get_or_create_subscriber(identifier="sub")
+
+                other_subs = []
+                thread = threading.Thread(target=lambda: other_subs.append(
+                    env.get_or_create_subscriber(identifier="sub")))
+                thread.start()
+                thread.join()
+
+                pooled_pub = env.publisher_pool(size=1).get()
+
+            self.assertTrue(pub.closed)
+            self.assertTrue(sub.closed)
+            self.assertTrue(other_subs[0].closed)
+            self.assertTrue(pooled_pub.closed)
+
+    def test_publisher_pool(self) -> None:
+        pool = self.env.publisher_pool(size=2)
+        self.assertEqual(2, pool.qsize())
+
+        pubs = [pool.get(), pool.get()]
+        for pub in pubs:
+            self.addCleanup(pub.close)
+
+        self.assertIsNot(pubs[0], pubs[1])
+        for pub in pubs:
+            self.assertIsInstance(pub, persipubsub.publisher.Publisher)
 
 
 if __name__ == '__main__':
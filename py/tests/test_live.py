@@ -1,13 +1,20 @@
 #!/usr/bin/env python
 """Test persipubsub live."""
+import concurrent.futures
+import itertools
 import multiprocessing
-import pathlib
+import multiprocessing.pool
+import os
+import sys
 import threading
 import time
 import unittest
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import lmdb
 import temppathlib
 
+import persipubsub.control
 import persipubsub.database
 import persipubsub.environment
 import persipubsub.publisher
@@ -18,117 +25,189 @@ import tests.component_publisher
 import tests.component_subscriber
 
 # pylint: disable=missing-docstring
-
-FIRST_SUB_STARTED_READING = False
-
-
-def subscriber_receive_first(sub: persipubsub.subscriber.Subscriber) -> None:
+# pylint: disable=protected-access
+
+# The worker processes are forked from a clean server process so that they do
+# not inherit the open LMDB environments of the test process.
+MP_CONTEXT = multiprocessing.get_context('forkserver')
+MP_CONTEXT.set_forkserver_preload([
+    'persipubsub.environment', 'persipubsub.publisher',
+    'persipubsub.subscriber', 'tests.component_publisher',
+    'tests.component_subscriber'
+])
+# load of the race condition tests; the multiprocess ones run only if
+# PP_STRESS is set
+NUM_MSG = int(os.environ.get('PP_NUM_MSG', 50))
+NUM_WORKERS = int(os.environ.get('PP_NUM_WORKERS', 50))
+# The calls of a test must all run at the same time since the subscribers
+# wait for the publishers, so the thread pool fits the largest test.
+NUM_THREADS = max(4, NUM_WORKERS)
+
+# The race condition tests check for lost messages, not for their durability,
+# so they do not wait for the disk on every commit.
+RACE_DURABILITY = persipubsub.queue.Durability.ASYNC
+
+
+def subscriber_receive_first(sub: persipubsub.subscriber.Subscriber,
+                             started: threading.Event) -> None:
     with sub.receive() as _:
-        global FIRST_SUB_STARTED_READING  # pylint: disable=global-statement
-        FIRST_SUB_STARTED_READING = True
+        started.set()
         time.sleep(2)
 
 
-def subscriber_receive_second(sub: persipubsub.subscriber.Subscriber) -> None:
-    global FIRST_SUB_STARTED_READING  # pylint: disable=global-statement
-
-    start = time.time()
-    while not FIRST_SUB_STARTED_READING:
-        if time.time() - start > 10:
-            raise TimeoutError
-        time.sleep(0.1)
+def subscriber_receive_second(sub: persipubsub.subscriber.Subscriber,
+                              started: threading.Event,
+                              result: threading.Event) -> None:
+    start = time.monotonic()
+    if not started.wait(timeout=10):
+        raise TimeoutError
 
     with sub.receive() as _:
-        if time.time() - start < 2:
-            assert sub.queue is not None
-            assert sub.queue.env is not None
-            assert sub.queue.env.path() is not None
-            assert sub.identifier is not None
-            result = pathlib.Path(sub.queue.env.path()) / sub.identifier
-            result.write_text('pass')
-        else:
-            assert sub.queue is not None
-            assert sub.queue.env is not None
-            assert sub.queue.env.path() is not None
-            assert sub.identifier is not None
-            result = pathlib.Path(sub.queue.env.path()) / sub.identifier
-            result.write_text('fail')
+        if time.monotonic() - start < 2:
+            result.set()
 
 
 def receive(sub: persipubsub.subscriber.Subscriber,
             num_msg: int,
+            result: threading.Event,
             timeout: int = 2,
             method_timeout: int = 60) -> None:
-    received_msg = 0
+    tests.component_subscriber.receive_all(
+        sub=sub,
+        num_msg=num_msg,
+        timeout=timeout,
+        retries=10,
+        method_timeout=method_timeout)
+
+    result.set()
+
 
-    start = time.time()
-    while True:
-        if received_msg == num_msg:
-            break
-        elif time.time() - start >= method_timeout:
-            raise TimeoutError
+def send(pub: persipubsub.publisher.Publisher,
+         num_msg: int,
+         batch_size: int = tests.component_publisher.BATCH_SIZE) -> None:
+    pub.send_many(
+        msgs=itertools.repeat(tests.HELLO, num_msg), batch_size=batch_size)
 
-        with sub.receive(timeout=timeout) as msg:
-            if msg is not None:
-                received_msg += 1
 
-    assert sub.queue is not None
-    assert sub.queue.env is not None
-    assert sub.queue.env.path() is not None
-    assert sub.identifier is not None
-    result = pathlib.Path(sub.queue.env.path()) / sub.identifier
-    result.write_text('pass')
+def lmdb_env(control: persipubsub.control.Control) -> lmdb.Environment:
+    """Give the LMDB environment underlying the control."""
+    assert control.queue is not None and control.queue.env is not None
+    return control.queue.env
 
 
-def send(pub: persipubsub.publisher.Publisher, num_msg: int) -> None:
-    for _ in range(num_msg):
-        pub.send(msg="hello subscriber".encode('utf-8'))
+def entry_counts(control: persipubsub.control.Control,
+                 db_keys: List[bytes]) -> Dict[bytes, int]:
+    """Count the entries of the given databases in a single transaction."""
+    queue_env = lmdb_env(control=control)
+    with queue_env.begin(write=False) as txn:
+        return {
+            key: txn.stat(db=queue_env.open_db(key=key, txn=txn))['entries']
+            for key in db_keys
+        }
+
+
+def run_concurrently(
+        executor: concurrent.futures.ThreadPoolExecutor,
+        calls: List[Tuple[Callable[..., None], Dict[str, Any]]]) -> None:
+    """Run each call in its own thread and re-raise the first failure."""
+    assert len(calls) <= NUM_THREADS
+    futures = [executor.submit(func, **kwargs) for func, kwargs in calls]
+    done, not_done = concurrent.futures.wait(
+        futures, return_when=concurrent.futures.FIRST_EXCEPTION)
+
+    # The calls which already run can not be cancelled. Wait for them so that
+    # they do not overlap with the next test.
+    for future in not_done:
+        future.cancel()
+    concurrent.futures.wait(not_done)
+
+    for future in done:
+        future.result()
 
 
 class TestLive(unittest.TestCase):
+    pool = None  # type: Optional[multiprocessing.pool.Pool]
+    executor = None  # type: Optional[concurrent.futures.ThreadPoolExecutor]
+
+    @classmethod
+    def process_pool(cls) -> multiprocessing.pool.Pool:
+        """Give the worker processes shared by the tests, start if needed."""
+        if cls.pool is None:
+            cls.pool = MP_CONTEXT.Pool(
+                processes=min(NUM_WORKERS, (os.cpu_count() or 1) * 2))
+
+        return cls.pool
+
+    @classmethod
+    def thread_pool(cls) -> concurrent.futures.ThreadPoolExecutor:
+        """Give the worker threads shared by the tests, start if needed."""
+        if cls.executor is None:
+            cls.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=NUM_THREADS)
+
+        return cls.executor
+
+    def setUp(self) -> None:
+        # Let the publisher and subscriber threads run longer between the
+        # switches of the GIL. This changes only the scheduling of CPython
+        # threads, not what the tests check.
+        self._old_switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(0.05)
+
+    def tearDown(self) -> None:
+        sys.setswitchinterval(self._old_switch_interval)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        if cls.pool is not None:
+            cls.pool.close()
+            cls.pool.join()
+            cls.pool = None
+
+        if cls.executor is not None:
+            cls.executor.shutdown()
+            cls.executor = None
+
     def test_multithreaded_communication_one_publisher_one_subscriber(
             self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             env = persipubsub.environment.initialize(path=tmp_dir.path)
             _ = env.new_control({'sub'})
 
-            result = tmp_dir.path / "sub"
-            result.touch()
+            result = threading.Event()
 
             pub = env.new_publisher()
             sub = env.new_subscriber(identifier='sub')
 
             num_msg = 1000
-            pub_thread = threading.Thread(
-                target=send, kwargs={
-                    'pub': pub,
-                    'num_msg': num_msg
-                })
-            sub_thread = threading.Thread(
-                target=receive, kwargs={
-                    'sub': sub,
-                    'num_msg': num_msg
-                })
 
-            pub_thread.start()
-            sub_thread.start()
-
-            for thread in [pub_thread, sub_thread]:
-                thread.join()
+            run_concurrently(
+                executor=self.thread_pool(),
+                calls=[
+                    (send, {
+                        'pub': pub,
+                        'num_msg': num_msg
+                    }),
+                    (receive, {
+                        'sub': sub,
+                        'result': result,
+                        'num_msg': num_msg
+                    }),
+                ])
 
-            self.assertEqual('pass', result.read_text())
+            self.assertTrue(result.is_set())
 
     # pylint: disable=too-many-locals
     def test_multithreaded_communication_two_publisher_two_subscriber(
             self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             env = persipubsub.environment.initialize(path=tmp_dir.path)
             _ = env.new_control({'sub1', 'sub2'})
 
-            result1 = tmp_dir.path / "sub1"
-            result1.touch()
-            result2 = tmp_dir.path / "sub2"
-            result2.touch()
+            result1 = threading.Event()
+            result2 = threading.Event()
 
             pub1 = env.new_publisher()
             pub2 = env.new_publisher()
@@ -137,146 +216,127 @@ class TestLive(unittest.TestCase):
 
             num_msg = 1000
 
-            pub1_thread = threading.Thread(
-                target=send, kwargs={
-                    'pub': pub1,
-                    'num_msg': num_msg
-                })
-            sub1_thread = threading.Thread(
-                target=receive, kwargs={
-                    'sub': sub1,
-                    'num_msg': 2 * num_msg
-                })
-            pub2_thread = threading.Thread(
-                target=send, kwargs={
-                    'pub': pub2,
-                    'num_msg': num_msg
-                })
-            sub2_thread = threading.Thread(
-                target=receive, kwargs={
-                    'sub': sub2,
-                    'num_msg': 2 * num_msg
-                })
-
-            pub1_thread.start()
-            sub1_thread.start()
-            pub2_thread.start()
-            sub2_thread.start()
-
-            for thread in [pub1_thread, sub1_thread, pub2_thread, sub2_thread]:
-                thread.join()
+            run_concurrently(
+                executor=self.thread_pool(),
+                calls=[
+                    (send, {
+                        'pub': pub1,
+                        'num_msg': num_msg
+                    }),
+                    (receive, {
+                        'sub': sub1,
+                        'result': result1,
+                        'num_msg': 2 * num_msg
+                    }),
+                    (send, {
+                        'pub': pub2,
+                        'num_msg': num_msg
+                    }),
+                    (receive, {
+                        'sub': sub2,
+                        'result': result2,
+                        'num_msg': 2 * num_msg
+                    }),
+                ])
 
-            self.assertEqual('pass', result1.read_text())
-            self.assertEqual('pass', result2.read_text())
+            self.assertTrue(result1.is_set())
+            self.assertTrue(result2.is_set())
 
     def test_multithreaded_component_publisher_component_subscriber(
             self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             env = persipubsub.environment.initialize(path=tmp_dir.path)
             _ = env.new_control({'sub'})
 
-            result = tmp_dir.path / "sub"
-            result.touch()
+            result = threading.Event()
 
             num_msg = 1000
-            pub_thread = threading.Thread(
-                target=tests.component_publisher.send_thread,
-                kwargs={
-                    'env': env,
-                    'num_msg': num_msg
-                })
-            sub_thread = threading.Thread(
-                target=tests.component_subscriber.receive_thread,
-                kwargs={
-                    'path': tmp_dir.path,
-                    'env': env,
-                    'identifier': 'sub',
-                    'num_msg': num_msg
-                })
-            pub_thread.start()
-            sub_thread.start()
-
-            for thread in [pub_thread, sub_thread]:
-                thread.join()
+            run_concurrently(
+                executor=self.thread_pool(),
+                calls=[
+                    (tests.component_publisher.send_thread, {
+                        'env': env,
+                        'num_msg': num_msg
+                    }),
+                    (tests.component_subscriber.receive_thread, {
+                        'env': env,
+                        'identifier': 'sub',
+                        'result': result,
+                        'num_msg': num_msg
+                    }),
+                ])
 
-            self.assertEqual('pass', result.read_text())
+            self.assertTrue(result.is_set())
 
     def test_multithreaded_two_component_publisher_component_subscriber(
             self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             env = persipubsub.environment.initialize(path=tmp_dir.path)
             _ = env.new_control({'sub1', 'sub2'})
 
-            result1 = tmp_dir.path / "sub1"
-            result1.touch()
-            result2 = tmp_dir.path / "sub2"
-            result2.touch()
+            result1 = threading.Event()
+            result2 = threading.Event()
 
             num_msg = 300
-            pub1_thread = threading.Thread(
-                target=tests.component_publisher.send_thread,
-                kwargs={
-                    'env': env,
-                    'num_msg': num_msg
-                })
-            sub1_thread = threading.Thread(
-                target=tests.component_subscriber.receive_thread,
-                kwargs={
-                    'path': tmp_dir.path,
-                    'env': env,
-                    'identifier': 'sub1',
-                    'num_msg': 2 * num_msg,
-                    'method_timeout': 60
-                })
-            pub2_thread = threading.Thread(
-                target=tests.component_publisher.send_thread,
-                kwargs={
-                    'env': env,
-                    'num_msg': num_msg
-                })
-            sub2_thread = threading.Thread(
-                target=tests.component_subscriber.receive_thread,
-                kwargs={
-                    'path': tmp_dir.path,
-                    'env': env,
-                    'identifier': 'sub2',
-                    'num_msg': 2 * num_msg,
-                    'method_timeout': 60
-                })
-            pub1_thread.start()
-            sub1_thread.start()
-            pub2_thread.start()
-            sub2_thread.start()
-
-            for thread in [pub1_thread, sub1_thread, pub2_thread, sub2_thread]:
-                thread.join()
+            run_concurrently(
+                executor=self.thread_pool(),
+                calls=[
+                    (tests.component_publisher.send_thread, {
+                        'env': env,
+                        'num_msg': num_msg
+                    }),
+                    (tests.component_subscriber.receive_thread, {
+                        'env': env,
+                        'identifier': 'sub1',
+                        'result': result1,
+                        'num_msg': 2 * num_msg,
+                        'method_timeout': 60
+                    }),
+                    (tests.component_publisher.send_thread, {
+                        'env': env,
+                        'num_msg': num_msg
+                    }),
+                    (tests.component_subscriber.receive_thread, {
+                        'env': env,
+                        'identifier': 'sub2',
+                        'result': result2,
+                        'num_msg': 2 * num_msg,
+                        'method_timeout': 60
+                    }),
+                ])
 
-            self.assertEqual('pass', result1.read_text())
-            self.assertEqual('pass', result2.read_text())
+            self.assertTrue(result1.is_set())
+            self.assertTrue(result2.is_set())
 
     def test_multiprocess_component_publisher_component_subscriber(
             self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             env = persipubsub.environment.initialize(path=tmp_dir.path)
             _ = env.new_control({'sub'})
-            env._env.close()  # pylint: disable=protected-access
 
-            result = tmp_dir.path / "sub"
-            result.touch()
+            result = MP_CONTEXT.Value('b', 0)
 
+            # The processes use the default durability so that at least one
+            # live test commits every message to disk.
             num_msg = 1000
-            pub_process = multiprocessing.Process(
+            pub_process = MP_CONTEXT.Process(
                 target=tests.component_publisher.send_process,
                 kwargs={
                     'path': tmp_dir.path,
-                    'num_msg': num_msg
+                    'num_msg': num_msg,
+                    'durability': persipubsub.queue.Durability.SYNC
                 })
-            sub_process = multiprocessing.Process(
+            sub_process = MP_CONTEXT.Process(
                 target=tests.component_subscriber.receive_process,
                 kwargs={
                     'path': tmp_dir.path,
                     'identifier': 'sub',
-                    'num_msg': num_msg
+                    'result': result,
+                    'num_msg': num_msg,
+                    'durability': persipubsub.queue.Durability.SYNC
                 })
             pub_process.start()
             sub_process.start()
@@ -284,45 +344,46 @@ class TestLive(unittest.TestCase):
             for process in [pub_process, sub_process]:
                 process.join()
 
-            self.assertEqual('pass', result.read_text())
+            self.assertEqual(1, result.value)
 
     def test_multiprocess_two_component_publisher_component_subscriber(
             self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             env = persipubsub.environment.initialize(path=tmp_dir.path)
             _ = env.new_control({'sub1', 'sub2'})
 
-            result1 = tmp_dir.path / "sub1"
-            result1.touch()
-            result2 = tmp_dir.path / "sub2"
-            result2.touch()
+            result1 = MP_CONTEXT.Value('b', 0)
+            result2 = MP_CONTEXT.Value('b', 0)
 
             num_msg = 300
-            pub1_process = multiprocessing.Process(
+            pub1_process = MP_CONTEXT.Process(
                 target=tests.component_publisher.send_process,
                 kwargs={
                     'path': tmp_dir.path,
                     'num_msg': num_msg
                 })
-            sub1_process = multiprocessing.Process(
+            sub1_process = MP_CONTEXT.Process(
                 target=tests.component_subscriber.receive_process,
                 kwargs={
                     'path': tmp_dir.path,
                     'identifier': 'sub1',
+                    'result': result1,
                     'num_msg': 2 * num_msg,
                     'method_timeout': 60
                 })
-            pub2_process = multiprocessing.Process(
+            pub2_process = MP_CONTEXT.Process(
                 target=tests.component_publisher.send_process,
                 kwargs={
                     'path': tmp_dir.path,
                     'num_msg': num_msg
                 })
-            sub2_process = multiprocessing.Process(
+            sub2_process = MP_CONTEXT.Process(
                 target=tests.component_subscriber.receive_process,
                 kwargs={
                     'path': tmp_dir.path,
                     'identifier': 'sub2',
+                    'result': result2,
                     'num_msg': 2 * num_msg,
                     'method_timeout': 60
                 })
@@ -336,119 +397,84 @@ class TestLive(unittest.TestCase):
             ]:
                 process.join()
 
-            self.assertEqual('pass', result1.read_text())
-            self.assertEqual('pass', result2.read_text())
+            self.assertEqual(1, result1.value)
+            self.assertEqual(1, result2.value)
 
     def test_multithreaded_race_condition_of_the_component_publisher(
             self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.initialize(path=tmp_dir.path)
-            control = env.new_control({'sub'})
-
-            num_msg = 50
-            num_threads = 50
-
-            threads = []
-            for _ in range(num_threads):
-                pub_thread = threading.Thread(
-                    target=tests.component_publisher.send_thread,
-                    kwargs={
-                        'env': env,
-                        'num_msg': num_msg
-                    })
-
-                pub_thread.start()
-                threads.append(pub_thread)
-
-            for thread in threads:
-                thread.join()
-
-            assert control.queue is not None  # pylint: disable=protected-access
-            assert control.queue.env is not None
-            with control.queue.env.begin(write=False) as txn:
-                sub_db = control.queue.env.open_db(
-                    key='sub'.encode('utf-8'), txn=txn)
-                self.assertEqual(num_msg * num_threads,
-                                 txn.stat(db=sub_db)['entries'])
-
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
+            # Closing the environment closes the publishers of the pool.
+            with persipubsub.environment.initialize(
+                    path=tmp_dir.path, durability=RACE_DURABILITY) as env:
+                control = env.new_control({'sub'})
+
+                num_msg = NUM_MSG
+                num_threads = NUM_WORKERS
+                pool = env.publisher_pool()
+
+                run_concurrently(
+                    executor=self.thread_pool(),
+                    calls=[
+                        (tests.component_publisher.send_pooled, {
+                            'pool': pool,
+                            'num_msg': num_msg
+                        }),
+                    ] * num_threads)
+
+                self.assertEqual({tests.SUB_DB: num_msg * num_threads},
+                                 entry_counts(
+                                     control=control, db_keys=[tests.SUB_DB]))
+
+    @unittest.skipUnless(
+        os.environ.get('PP_STRESS'), "stress test, set PP_STRESS to run")
     def test_multiprocess_race_condition_of_the_component_publisher(
             self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.initialize(path=tmp_dir.path)
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
+            env = persipubsub.environment.initialize(
+                path=tmp_dir.path, durability=RACE_DURABILITY)
             control = env.new_control({'sub'})
 
-            num_msg = 50
-            num_processes = 50
-
-            processes = []
-            for _ in range(num_processes):
-                pub_process = multiprocessing.Process(
-                    target=tests.component_publisher.send_process,
-                    kwargs={
-                        'path': tmp_dir.path,
-                        'num_msg': num_msg
-                    })
-
-                pub_process.start()
-                processes.append(pub_process)
+            num_msg = NUM_MSG
+            num_processes = NUM_WORKERS
 
-            for process in processes:
-                process.join()
+            self.process_pool().starmap(
+                tests.component_publisher.send_process,
+                [(tmp_dir.path, num_msg)] * num_processes)
 
-            assert control.queue is not None  # pylint: disable=protected-access
-            assert control.queue.env is not None
-            with control.queue.env.begin(write=False) as txn:
-                sub_db = control.queue.env.open_db(
-                    key='sub'.encode('utf-8'), txn=txn)
-                self.assertEqual(num_processes * num_msg,
-                                 txn.stat(db=sub_db)['entries'])
+            self.assertEqual({tests.SUB_DB: num_processes * num_msg},
+                             entry_counts(
+                                 control=control, db_keys=[tests.SUB_DB]))
 
+    @unittest.skipUnless(
+        os.environ.get('PP_STRESS'), "stress test, set PP_STRESS to run")
     def test_multiprocess_race_condition_of_the_component_publisher_one_env(
             self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.initialize(path=tmp_dir.path)
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
+            env = persipubsub.environment.initialize(
+                path=tmp_dir.path, durability=RACE_DURABILITY)
             control = env.new_control(subscriber_ids={'sub'})
 
-            num_msg = 50
-            num_processes = 50
+            num_msg = NUM_MSG
+            num_processes = NUM_WORKERS
 
-            processes = []
-            for _ in range(num_processes):
-                pub_process = multiprocessing.Process(
-                    target=tests.component_publisher.send_process,
-                    kwargs={
-                        'num_msg': num_msg,
-                        'path': tmp_dir.path,
-                    })
+            self.process_pool().starmap(
+                tests.component_publisher.send_process,
+                [(tmp_dir.path, num_msg)] * num_processes)
 
-                pub_process.start()
-                processes.append(pub_process)
-
-            for process in processes:
-                process.join()
-
-            assert control.queue is not None  # pylint: disable=protected-access
-            assert control.queue.env is not None
-            with control.queue.env.begin(write=False) as txn:
-                sub_db = control.queue.env.open_db(
-                    key='sub'.encode('utf-8'), txn=txn)
-                self.assertEqual(num_processes * num_msg,
-                                 txn.stat(db=sub_db)['entries'])
-                data_db = control.queue.env.open_db(
-                    key=persipubsub.database.DATA_DB, txn=txn)
-                self.assertEqual(num_processes * num_msg,
-                                 txn.stat(db=data_db)['entries'])
-                meta_db = control.queue.env.open_db(
-                    key=persipubsub.database.META_DB, txn=txn)
-                self.assertEqual(num_processes * num_msg,
-                                 txn.stat(db=meta_db)['entries'])
-                pending_db = control.queue.env.open_db(
-                    key=persipubsub.database.PENDING_DB, txn=txn)
-                self.assertEqual(num_processes * num_msg,
-                                 txn.stat(db=pending_db)['entries'])
+            db_keys = [
+                tests.SUB_DB, persipubsub.database.DATA_DB,
+                persipubsub.database.META_DB, persipubsub.database.PENDING_DB
+            ]
+            self.assertEqual(
+                dict.fromkeys(db_keys, num_processes * num_msg),
+                entry_counts(control=control, db_keys=db_keys))
 
     def test_2_subscriber_non_blocking(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             env = persipubsub.environment.initialize(path=tmp_dir.path)
             _ = env.new_control(subscriber_ids={'sub1', 'sub2'})
 
@@ -458,26 +484,23 @@ class TestLive(unittest.TestCase):
 
             pub.send(msg='msg for two subscriber'.encode('utf-8'))
 
-            sub1_thread = threading.Thread(
-                target=subscriber_receive_first, kwargs={
-                    'sub': sub1,
-                })
-            sub2_thread = threading.Thread(
-                target=subscriber_receive_second, kwargs={
-                    'sub': sub2,
-                })
-            sub1_thread.start()
-            sub2_thread.start()
-
-            for thread in [sub1_thread, sub2_thread]:
-                thread.join()
-
-            assert sub2.queue is not None
-            assert sub2.queue.env is not None
-            assert sub2.queue.env.path() is not None
-            assert sub2.identifier is not None
-            result = pathlib.Path(sub2.queue.env.path()) / sub2.identifier
-            self.assertEqual('pass', result.read_text())
+            started = threading.Event()
+            result = threading.Event()
+            run_concurrently(
+                executor=self.thread_pool(),
+                calls=[
+                    (subscriber_receive_first, {
+                        'sub': sub1,
+                        'started': started
+                    }),
+                    (subscriber_receive_second, {
+                        'sub': sub2,
+                        'started': started,
+                        'result': result
+                    }),
+                ])
+
+            self.assertTrue(result.is_set())
 
 
 if __name__ == '__main__':
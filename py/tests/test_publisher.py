@@ -1,96 +1,103 @@
 #!/usr/bin/env python
 """Test publisher."""
 
+import itertools
 import unittest
-from typing import Set
+import unittest.mock
 
-import temppathlib
-
-import persipubsub.control
-import persipubsub.environment
-import persipubsub.queue
 import tests
 
 # pylint: disable=missing-docstring
 # pylint: disable=protected-access
 
 
-def setup(env: persipubsub.environment.Environment,
-          sub_set: Set[str]) -> persipubsub.control.Control:
-    """Create an initialized control"""
-    hwm = persipubsub.queue.HighWaterMark()
-    strategy = persipubsub.queue.Strategy.PRUNE_FIRST
-
-    control = env.new_control(
-        subscriber_ids=sub_set, high_water_mark=hwm, strategy=strategy)
+class TestPublisher(tests.QueueTestCase):
+    def test_send(self) -> None:
+        # pylint: disable=too-many-locals
+        env = self.env
 
-    return control
+        pub = env.new_publisher()
 
+        msg = tests.MSG
+        pub.send(msg=msg)
 
-class TestPublisher(unittest.TestCase):
-    def test_send(self) -> None:
-        # pylint: disable=too-many-locals
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
-            _ = setup(env=env, sub_set={'sub'})
+        assert pub.queue is not None
+        with env._env.begin(write=False) as txn:
+            self.assertIsNotNone(txn.get(key=tests.SUB_DB))
+            sub_db = env._env.open_db(key=tests.SUB_DB, txn=txn, create=False)
+            cursor = txn.cursor(db=sub_db)
+            self.assertTrue(cursor.first())
 
-            pub = env.new_publisher()
+            key = cursor.key()
 
-            msg = "Hello world!".encode(tests.ENCODING)
-            pub.send(msg=msg)
+            item = txn.get(key=key, db=pub.queue._handles.data_db)
+            self.assertIsNotNone(item)
+            self.assertEqual(msg, item)
 
-            subscriber = "sub".encode(tests.ENCODING)
+    def test_send_reused_buffer(self) -> None:
+        env = self.env
 
-            with env._env.begin(write=False) as txn:
-                self.assertIsNotNone(txn.get(key=subscriber))
-                sub_db = env._env.open_db(key=subscriber, txn=txn, create=False)
-                cursor = txn.cursor(db=sub_db)
-                self.assertTrue(cursor.first())
+        pub = env.new_publisher()
+        sub = env.new_subscriber(identifier='sub')
 
-                key = cursor.key()
+        buf = bytearray(len("message 0"))
+        for index in range(2):
+            buf[:] = "message {}".format(index).encode(tests.ENCODING)
+            pub.send(msg=memoryview(buf))
 
-                data_db = env._env.open_db(
-                    key=tests.DATA_DB, txn=txn, create=False)
-                item = txn.get(key=key, db=data_db)
-                self.assertIsNotNone(item)
-                self.assertEqual(msg, item)
+        self.assertListEqual([
+            "message 0".encode(tests.ENCODING), "message 1".encode(
+                tests.ENCODING)
+        ], sub.receive_many(max_msg_num=2))
 
     def test_send_many(self) -> None:
         # pylint: disable=too-many-locals
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
-            subscriber = "sub"
-            _ = setup(env=env, sub_set={subscriber})
+        env = self.env
+
+        pub = env.new_publisher()
+
+        msg = tests.MSG
+        msg_num = 10
+
+        pub.send_many(msgs=itertools.repeat(msg, msg_num))
+
+        assert pub.queue is not None
+        assert pub.queue.env is not None
+        with pub.queue.env.begin(write=False) as txn:
+            self.assertIsNotNone(txn.get(key=tests.SUB_DB))
 
-            pub = env.new_publisher()
+            sub_db = pub.queue.env.open_db(
+                key=tests.SUB_DB, txn=txn, create=False)
 
-            msg = "I'm a message".encode(tests.ENCODING)
-            msgs = []
-            msg_num = 10
-            for _ in range(msg_num):
-                msgs.append(msg)
+            sub_stat = txn.stat(db=sub_db)
+            self.assertEqual(msg_num, sub_stat['entries'])
 
-            pub.send_many(msgs=msgs)
+            data_db = pub.queue._handles.data_db
 
-            assert pub.queue is not None
-            assert pub.queue.env is not None
-            with pub.queue.env.begin(write=False) as txn:
-                self.assertIsNotNone(
-                    txn.get(key=subscriber.encode(tests.ENCODING)))
+            data_stat = txn.stat(db=data_db)
+            self.assertEqual(msg_num, data_stat['entries'])
 
-                sub_db = pub.queue.env.open_db(
-                    key=subscriber.encode(tests.ENCODING),
-                    txn=txn,
-                    create=False)
+    def test_send_many_in_batches(self) -> None:
+        env = self.env
 
-                sub_stat = txn.stat(db=sub_db)
-                self.assertEqual(msg_num, sub_stat['entries'])
+        pub = env.new_publisher()
+        sub = env.new_subscriber(identifier='sub')
 
-                data_db = pub.queue.env.open_db(
-                    key=tests.DATA_DB, txn=txn, create=False)
+        assert pub.queue is not None
+        msgs = [
+            "message {}".format(index).encode(tests.ENCODING)
+            for index in range(5)
+        ]
+        with unittest.mock.patch.object(
+                pub.queue,
+                'put_many_flush_once',
+                wraps=pub.queue.put_many_flush_once) as put_mock:
+            pub.send_many(msgs=iter(msgs), batch_size=2)
 
-                data_stat = txn.stat(db=data_db)
-                self.assertEqual(msg_num, data_stat['entries'])
+        self.assertListEqual(
+            [msgs[0:2], msgs[2:4], msgs[4:5]],
+            [call[1]['msgs'] for call in put_mock.call_args_list])
+        self.assertListEqual(msgs, sub.receive_many(max_msg_num=5))
 
 
 if __name__ == '__main__':
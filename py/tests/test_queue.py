@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
 """Test database."""
 
-import time
+import itertools
 import unittest
-from typing import Set
+import unittest.mock
+import uuid
+from typing import Any, Set
 
 import temppathlib
 
 import persipubsub.control
+import persipubsub.database
 import persipubsub.environment
 import persipubsub.queue
 import tests
@@ -18,21 +21,31 @@ import tests
 
 def setup(env: persipubsub.environment.Environment,
           sub_set: Set[str]) -> persipubsub.control.Control:
-    """Create an initialized control"""
-    hwm = persipubsub.queue.HighWaterMark()
-    strategy = persipubsub.queue.Strategy.PRUNE_FIRST
+    """Create an initialized control with the default limits and strategy."""
+    return env.new_control(subscriber_ids=sub_set)
 
-    control = env.new_control(
-        subscriber_ids=sub_set, high_water_mark=hwm, strategy=strategy)
 
-    return control
+class TestQueue(tests.QueueTestCase):
+    # pylint: disable=too-many-public-methods
+    sub_db = None  # type: Any
 
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+
+        # The handle of the database of the subscriber 'sub' stays valid
+        # since the database is only emptied between the tests.
+        assert cls._env is not None
+        with cls._env._env.begin(write=True) as txn:
+            cls.sub_db = cls._env._env.open_db(
+                key=tests.SUB_DB, txn=txn, create=False)
 
-class TestQueue(unittest.TestCase):
     def test_initialize_environment(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             env = persipubsub.queue._initialize_environment(
                 queue_dir=tmp_dir.path)
+            self.addCleanup(env.close)
 
             self.assertDictEqual({
                 'branch_pages': 0,
@@ -52,47 +65,41 @@ class TestQueue(unittest.TestCase):
             }, env.info())
 
     def test_put_to_single_subscriber(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            msg = "I'm a message.".encode(tests.ENCODING)
+        msg = tests.MSG
 
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
+        env = self.env
 
-            subscriber = 'sub'
-            _ = setup(env=env, sub_set={subscriber})
+        queue = env.new_publisher().queue
+        assert queue is not None
+        queue.put(msg=msg)
 
-            queue = env.new_publisher().queue
-            assert queue is not None
-            queue.put(msg=msg)
+        assert queue.env is not None
+        with queue.env.begin() as txn:
+            self.assertIsNotNone(txn.get(key=tests.SUB_DB))
 
-            assert queue.env is not None
-            with queue.env.begin() as txn:
-                self.assertIsNotNone(
-                    txn.get(key=subscriber.encode(tests.ENCODING)))
-
-                sub_db = queue.env.open_db(
-                    key=subscriber.encode(tests.ENCODING),
-                    txn=txn,
-                    create=False)
-                cursor = txn.cursor(db=sub_db)
-                self.assertTrue(cursor.first())
-                key = cursor.key()
+            sub_db = self.sub_db
+            cursor = txn.cursor(db=sub_db)
+            self.assertTrue(cursor.first())
+            key = cursor.key()
 
-                data_db = queue.env.open_db(
-                    key=tests.DATA_DB, txn=txn, create=False)
+            data_db = queue._handles.data_db
 
-                value = txn.get(key=key, db=data_db)
-                self.assertIsNotNone(value)
-                self.assertEqual(msg, value)
+            value = txn.get(key=key, db=data_db)
+            self.assertIsNotNone(value)
+            self.assertEqual(msg, value)
 
     def test_put_multiple_subscriber(self) -> None:
         # pylint: disable=too-many-locals
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            msg = "I'm a message.".encode(tests.ENCODING)
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
+            msg = tests.MSG
 
-            sub_set = {"sub", "another_sub"}
+            sub_ids = ("sub", "another_sub")
+            sub_keys = [sub_id.encode(tests.ENCODING) for sub_id in sub_ids]
 
             env = persipubsub.environment.Environment(path=tmp_dir.path)
-            _ = setup(env=env, sub_set=sub_set)
+            self.addCleanup(env.close)
+            _ = setup(env=env, sub_set=set(sub_ids))
 
             queue = env.new_publisher().queue
             assert queue is not None
@@ -100,32 +107,25 @@ class TestQueue(unittest.TestCase):
 
             assert queue.env is not None
             with queue.env.begin() as txn:
-                self.assertIsNotNone(
-                    txn.get(key=list(sub_set)[0].encode(tests.ENCODING)))
+                self.assertIsNotNone(txn.get(key=sub_keys[0]))
 
                 sub_db_0 = queue.env.open_db(
-                    key=list(sub_set)[0].encode(tests.ENCODING),
-                    txn=txn,
-                    create=False)
+                    key=sub_keys[0], txn=txn, create=False)
                 cursor = txn.cursor(db=sub_db_0)
                 self.assertTrue(cursor.first())
                 key_0 = cursor.key()
 
-                self.assertIsNotNone(
-                    txn.get(key=list(sub_set)[1].encode(tests.ENCODING)))
+                self.assertIsNotNone(txn.get(key=sub_keys[1]))
 
                 sub_db_1 = queue.env.open_db(
-                    key=list(sub_set)[1].encode(tests.ENCODING),
-                    txn=txn,
-                    create=False)
+                    key=sub_keys[1], txn=txn, create=False)
                 cursor = txn.cursor(db=sub_db_1)
                 self.assertTrue(cursor.first())
                 key_1 = cursor.key()
 
                 self.assertEqual(key_0, key_1)
 
-                data_db = queue.env.open_db(
-                    key=tests.DATA_DB, txn=txn, create=False)
+                data_db = queue._handles.data_db
 
                 value = txn.get(key=key_1, db=data_db)
                 self.assertIsNotNone(value)
@@ -133,121 +133,200 @@ class TestQueue(unittest.TestCase):
 
     def test_put_many(self) -> None:
         # pylint: disable=too-many-locals
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
+        env = self.env
 
-            subscriber = 'sub'
-            _ = setup(env=env, sub_set={subscriber})
-
-            queue = env.new_publisher().queue
-            assert queue is not None
+        queue = env.new_publisher().queue
+        assert queue is not None
 
-            msg = "I'm a message".encode(tests.ENCODING)
-            msgs = []
-            msg_num = 10
-            for _ in range(msg_num):
-                msgs.append(msg)
+        msg = tests.MSG
+        msg_num = 10
+        msgs = [msg] * msg_num
 
+        # the messages are committed in a single write transaction;
+        # cleanup commits on its own and is not counted.
+        with unittest.mock.patch.object(queue, 'cleanup'), \
+                unittest.mock.patch.object(
+                    queue, 'env', wraps=queue.env) as env_mock:
             queue.put_many_flush_once(msgs=msgs)
 
-            assert queue.env is not None
-            with queue.env.begin(write=False) as txn:
-                self.assertIsNotNone(
-                    txn.get(key=subscriber.encode(tests.ENCODING)))
+        write_begins = [
+            call for call in env_mock.begin.call_args_list
+            if call[1].get('write')
+        ]
+        self.assertEqual(1, len(write_begins))
+
+        assert queue.env is not None
+        with queue.env.begin(write=False) as txn:
+            self.assertIsNotNone(txn.get(key=tests.SUB_DB))
+
+            sub_db = self.sub_db
+
+            sub_stat = txn.stat(db=sub_db)
+            self.assertEqual(msg_num, sub_stat['entries'])
+
+            data_db = queue._handles.data_db
+
+            data_stat = txn.stat(db=data_db)
+            self.assertEqual(msg_num, data_stat['entries'])
+
+    def test_put_many_keeps_order(self) -> None:
+        env = self.env
 
-                sub_db = queue.env.open_db(
-                    key=subscriber.encode(tests.ENCODING),
-                    txn=txn,
-                    create=False)
+        subscriber = 'sub'
 
-                sub_stat = txn.stat(db=sub_db)
-                self.assertEqual(msg_num, sub_stat['entries'])
+        queue = env.new_publisher().queue
+        assert queue is not None
 
-                data_db = queue.env.open_db(
-                    key=tests.DATA_DB, txn=txn, create=False)
+        # the messages of a batch are published in the same microseconds
+        msgs = list(tests.SECRET_MSGS)
+        queue.put_many_flush_once(msgs=msgs)
 
-                data_stat = txn.stat(db=data_db)
-                self.assertEqual(msg_num, data_stat['entries'])
+        self.assertListEqual(
+            msgs, queue.pop_many(sub_id=subscriber, max_msg_num=len(msgs)))
+
+    def test_msg_ids_sort_after_older_ids(self) -> None:
+        now = persipubsub.queue._now()
+
+        # layout of the IDs written by older versions of the queue
+        older_id = persipubsub.database.str_to_bytes(
+            str(now - 1) + str(uuid.uuid4()))
+
+        with unittest.mock.patch.object(
+                persipubsub.queue, '_now', return_value=now):
+            msg_ids = [persipubsub.queue._new_msg_id() for _ in range(10)]
+
+        self.assertListEqual(msg_ids, sorted(msg_ids))
+        self.assertLess(older_id, msg_ids[0])
 
     def test_front(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            msg = "I'm a message.".encode(tests.ENCODING)
+        msg = tests.MSG
 
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
+        env = self.env
 
-            subscriber = 'sub'
-            _ = setup(env=env, sub_set={subscriber})
+        subscriber = 'sub'
 
-            queue = env.new_publisher().queue
-            assert queue is not None
-            queue.put(msg=msg)
+        queue = env.new_publisher().queue
+        assert queue is not None
+        queue.put(msg=msg)
 
-            # pylint: disable=assignment-from-none
-            # pylint: disable=assignment-from-no-return
-            _, received_msg = queue.front(sub_id=subscriber)
-            self.assertIsNotNone(received_msg)
-            self.assertEqual(msg, received_msg)
+        # pylint: disable=assignment-from-none
+        # pylint: disable=assignment-from-no-return
+        _, received_msg = queue.front(sub_id=subscriber)
+        self.assertIsNotNone(received_msg)
+        self.assertEqual(msg, received_msg)
 
     def test_pop(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            msg = "I'm a message.".encode(tests.ENCODING)
+        msg = tests.MSG
 
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
+        env = self.env
 
-            subscriber = 'sub'
-            _ = setup(env=env, sub_set={subscriber})
+        subscriber = 'sub'
 
-            queue = env.new_publisher().queue
-            assert queue is not None
-            queue.put(msg=msg)
+        queue = env.new_publisher().queue
+        assert queue is not None
+        queue.put(msg=msg)
 
-            # pylint: disable=assignment-from-none
-            # pylint: disable=assignment-from-no-return
-            _, received_msg = queue.front(sub_id=subscriber)
-            self.assertIsNotNone(received_msg)
+        # pylint: disable=assignment-from-none
+        # pylint: disable=assignment-from-no-return
+        msg_id, received_msg = queue.front(sub_id=subscriber)
+        self.assertIsNotNone(received_msg)
+        assert msg_id is not None
 
-            assert queue.env is not None
-            with queue.env.begin() as txn:
-                pending_db = queue.env.open_db(
-                    key=tests.PENDING_DB, txn=txn, create=False)
+        assert queue.env is not None
+        with queue.env.begin() as txn:
+            pending_db = queue._handles.pending_db
 
-                cursor = txn.cursor(db=pending_db)
-                self.assertTrue(cursor.first())
-                pending_before_pop = cursor.value()
+            # the counters are compared in their stored form
+            self.assertEqual(tests.PENDING_ONE,
+                             txn.get(key=msg_id, db=pending_db))
 
-            queue.pop(sub_id=subscriber)
+        queue.pop(sub_id=subscriber)
 
-            _, received_msg = queue.front(sub_id=subscriber)
+        _, received_msg = queue.front(sub_id=subscriber)
 
-            self.assertIsNone(received_msg)
+        self.assertIsNone(received_msg)
 
-            with queue.env.begin() as txn:
-                pending_db = queue.env.open_db(
-                    key=tests.PENDING_DB, txn=txn, create=False)
-                cursor = txn.cursor(db=pending_db)
-                self.assertTrue(cursor.first())
-                pending_after_pop = cursor.value()
+        with queue.env.begin() as txn:
+            self.assertEqual(tests.PENDING_ZERO,
+                             txn.get(key=msg_id, db=pending_db))
 
-            self.assertEqual(
-                int.from_bytes(pending_before_pop, tests.BYTES_ORDER) - 1,
-                int.from_bytes(pending_after_pop, tests.BYTES_ORDER))
+    def test_pop_many(self) -> None:
+        env = self.env
 
-    def test_pop_queue_empty(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        subscriber = 'sub'
 
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
+        queue = env.new_publisher().queue
+        assert queue is not None
+        msgs = list(tests.SECRET_MSGS[:3])
+        for msg in msgs:
+            queue.put(msg=msg)
 
-            subscriber = 'sub'
-            _ = setup(env=env, sub_set={subscriber})
+        self.assertListEqual(msgs[:2],
+                             queue.pop_many(sub_id=subscriber, max_msg_num=2))
+        self.assertListEqual(msgs[2:],
+                             queue.pop_many(sub_id=subscriber, max_msg_num=2))
+        self.assertListEqual([], queue.pop_many(
+            sub_id=subscriber, max_msg_num=2))
+
+        assert queue.env is not None
+        with queue.env.begin() as txn:
+            pending_db = queue._handles.pending_db
+            pending_nums = [
+                int.from_bytes(value, tests.BYTES_ORDER)
+                for value in txn.cursor(
+                    db=pending_db).iternext(keys=False, values=True)
+            ]
+            self.assertListEqual([0, 0, 0], pending_nums)
+
+    def test_pop_all_but_last(self) -> None:
+        env = self.env
+
+        subscriber = 'sub'
+
+        queue = env.new_publisher().queue
+        assert queue is not None
+        for msg in tests.SECRET_MSGS[:3]:
+            queue.put(msg=msg)
 
-            queue = env.new_publisher().queue
-            assert queue is not None
+        assert queue.env is not None
+        with queue.env.begin() as txn:
+            tail_item = list(txn.cursor(db=self.sub_db).iternext())[-1]
+
+        queue.pop_all_but_last(sub_id=subscriber)
+
+        _, received_msg = queue.front(sub_id=subscriber)
+        self.assertEqual(tests.SECRET_MSGS[2], received_msg)
 
-            self.assertRaises(RuntimeError, queue.pop, sub_id=subscriber)
+        with queue.env.begin() as txn:
+            sub_db = self.sub_db
+            self.assertEqual(1, txn.stat(db=sub_db)['entries'])
+            self.assertListEqual([tail_item],
+                                 list(txn.cursor(db=sub_db).iternext()))
+
+            pending_db = queue._handles.pending_db
+            pending_nums = [
+                int.from_bytes(value, tests.BYTES_ORDER)
+                for value in txn.cursor(
+                    db=pending_db).iternext(keys=False, values=True)
+            ]
+            self.assertListEqual([0, 0, 1], pending_nums)
+
+    def test_pop_queue_empty(self) -> None:
+        env = self.env
+
+        subscriber = 'sub'
+
+        queue = env.new_publisher().queue
+        assert queue is not None
+
+        with self.assertRaises(RuntimeError):
+            queue.pop(sub_id=subscriber)
 
     def test_queue_initialisation(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             env = persipubsub.environment.Environment(path=tmp_dir.path)
+            self.addCleanup(env.close)
 
             subscriber = 'sub'
             control = setup(env=env, sub_set={subscriber})
@@ -276,35 +355,33 @@ class TestQueue(unittest.TestCase):
             self.assertEqual({'sub'}, queue.subscriber_ids)
 
     def test_overflow_msgs_limit(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
-
-            subscriber = 'sub'
-            _ = setup(env=env, sub_set={subscriber})
+        env = self.env
 
-            queue = env.new_publisher().queue
-            assert queue is not None
+        queue = env.new_publisher().queue
+        assert queue is not None
 
-            assert queue.hwm is not None
-            queue.hwm.max_messages = tests.TEST_HWM_MSG_NUM
+        assert queue.hwm is not None
+        queue.hwm.max_messages = tests.TEST_HWM_MSG_NUM
 
-            msg = "hello world".encode(tests.ENCODING)
+        msg = tests.MSG
 
-            self.assertEqual(0, queue.count_msgs())
-            for _ in range(tests.TEST_HWM_MSG_NUM):
-                queue.put(msg=msg)
+        self.assertEqual(0, queue.count_msgs())
+        queue.put_many_flush_once(
+            msgs=itertools.repeat(msg, tests.TEST_HWM_MSG_NUM))
 
-            self.assertEqual(tests.TEST_HWM_MSG_NUM, queue.count_msgs())
+        self.assertEqual(tests.TEST_HWM_MSG_NUM, queue.count_msgs())
 
-            queue.put(msg=msg)
+        queue.put(msg=msg)
 
-            self.assertEqual(
-                int(tests.TEST_HWM_MSG_NUM - int(tests.TEST_HWM_MSG_NUM / 2)),
-                queue.count_msgs())
+        self.assertEqual(
+            int(tests.TEST_HWM_MSG_NUM - int(tests.TEST_HWM_MSG_NUM / 2)),
+            queue.count_msgs())
 
     def test_overflow_limit_size(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
             env = persipubsub.environment.Environment(path=tmp_dir.path)
+            self.addCleanup(env.close)
 
             subscriber = 'sub'
             _ = setup(env=env, sub_set={subscriber})
@@ -315,7 +392,7 @@ class TestQueue(unittest.TestCase):
             assert queue.hwm is not None
             queue.hwm.hwm_lmdb_size = tests.TEST_HWM_LMDB_SIZE
 
-            msg = ("a" * (int(tests.LMDB_PAGE_SIZE / 4))).encode(tests.ENCODING)
+            msg = tests.FILLER_MSG
 
             while queue.check_current_lmdb_size() <= tests.TEST_HWM_LMDB_SIZE:
                 queue.put(msg=msg)
@@ -329,90 +406,73 @@ class TestQueue(unittest.TestCase):
                 queue.check_current_lmdb_size() <= tests.TEST_HWM_LMDB_SIZE)
 
     def test_timeout(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
+        env = self.env
 
-            subscriber = 'sub'
-            _ = setup(env=env, sub_set={subscriber})
-
-            queue = env.new_publisher().queue
-            assert queue is not None
+        queue = env.new_publisher().queue
+        assert queue is not None
 
-            assert queue.hwm is not None
-            queue.hwm.message_timeout = tests.TEST_MSG_TIMEOUT
+        assert queue.hwm is not None
+        queue.hwm.message_timeout = tests.TEST_MSG_TIMEOUT
 
-            msg = "hello world".encode(tests.ENCODING)
+        msg = tests.MSG
 
+        # the messages are aged by advancing the clock of the queue
+        # instead of sleeping.
+        now = persipubsub.queue._now()
+        with unittest.mock.patch.object(persipubsub.queue, '_now') as now_mock:
+            now_mock.return_value = now
             queue.put(msg=msg)
             self.assertEqual(1, queue.count_msgs())
             queue.put(msg=msg)
             self.assertEqual(2, queue.count_msgs())
-            time.sleep(tests.TEST_MSG_TIMEOUT + 1)
+
+            now_mock.return_value = now + tests.TEST_MSG_TIMEOUT + 1
             queue.put(msg=msg)
             self.assertEqual(1, queue.count_msgs())
 
     def test_strategy_prune_first(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
-
-            subscriber = 'sub'
-            _ = setup(env=env, sub_set={subscriber})
+        env = self.env
 
-            queue = env.new_publisher().queue
-            assert queue is not None
-            queue.strategy = persipubsub.queue.Strategy.PRUNE_FIRST
+        queue = env.new_publisher().queue
+        assert queue is not None
+        queue.strategy = persipubsub.queue.Strategy.PRUNE_FIRST
 
-            assert queue.hwm is not None
-            queue.hwm.max_messages = tests.TEST_HWM_MSG_NUM
+        assert queue.hwm is not None
+        queue.hwm.max_messages = tests.TEST_HWM_MSG_NUM
 
-            for index in range(tests.TEST_HWM_MSG_NUM):
-                msg = "secret message {}".format(index).encode(tests.ENCODING)
-                queue.put(msg=msg)
+        queue.put_many_flush_once(
+            msgs=tests.SECRET_MSGS[:tests.TEST_HWM_MSG_NUM])
 
-            _, received_msg = queue.front(sub_id='sub')
-            self.assertEqual("secret message 0".encode(tests.ENCODING),
-                             received_msg)
+        _, received_msg = queue.front(sub_id='sub')
+        self.assertEqual(tests.SECRET_MSGS[0], received_msg)
 
-            msg = "secret message {}".format(tests.TEST_HWM_MSG_NUM).encode(
-                tests.ENCODING)
-            queue.put(msg=msg)
+        queue.put(msg=tests.SECRET_MSGS[tests.TEST_HWM_MSG_NUM])
 
-            _, received_msg = queue.front(sub_id='sub')
+        _, received_msg = queue.front(sub_id='sub')
 
-            self.assertEqual(
-                "secret message {}".format(
-                    int((tests.TEST_HWM_MSG_NUM / 2) + 1)).encode(
-                        tests.ENCODING), received_msg)
+        self.assertEqual(tests.SECRET_MSGS[tests.TEST_HWM_MSG_NUM // 2 + 1],
+                         received_msg)
 
     def test_strategy_prune_last(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
-
-            subscriber = 'sub'
-            _ = setup(env=env, sub_set={subscriber})
+        env = self.env
 
-            queue = env.new_publisher().queue
-            assert queue is not None
-            queue.strategy = persipubsub.queue.Strategy.PRUNE_LAST
+        queue = env.new_publisher().queue
+        assert queue is not None
+        queue.strategy = persipubsub.queue.Strategy.PRUNE_LAST
 
-            assert queue.hwm is not None
-            queue.hwm.max_messages = tests.TEST_HWM_MSG_NUM
+        assert queue.hwm is not None
+        queue.hwm.max_messages = tests.TEST_HWM_MSG_NUM
 
-            for index in range(tests.TEST_HWM_MSG_NUM):
-                msg = "secret message {}".format(index).encode(tests.ENCODING)
-                queue.put(msg=msg)
+        queue.put_many_flush_once(
+            msgs=tests.SECRET_MSGS[:tests.TEST_HWM_MSG_NUM])
 
-            _, received_msg = queue.front(sub_id='sub')
-            self.assertEqual("secret message 0".encode(tests.ENCODING),
-                             received_msg)
+        _, received_msg = queue.front(sub_id='sub')
+        self.assertEqual(tests.SECRET_MSGS[0], received_msg)
 
-            msg = "secret message {}".format(tests.TEST_HWM_MSG_NUM).encode(
-                tests.ENCODING)
-            queue.put(msg=msg)
+        queue.put(msg=tests.SECRET_MSGS[tests.TEST_HWM_MSG_NUM])
 
-            _, received_msg = queue.front(sub_id='sub')
-            self.assertEqual("secret message 0".encode(tests.ENCODING),
-                             received_msg)
+        _, received_msg = queue.front(sub_id='sub')
+        self.assertEqual(tests.SECRET_MSGS[0], received_msg)
 
 
 if __name__ == '__main__':
@@ -1,14 +1,14 @@
 #!/usr/bin/env python
 """Test subscriber."""
 
+import threading
+import time
 import unittest
-from typing import Set
 
 import temppathlib
 
 import persipubsub.control
 import persipubsub.environment
-import persipubsub.queue
 import persipubsub.subscriber
 import tests
 
@@ -16,127 +16,223 @@ import tests
 # pylint: disable=protected-access
 
 
-def setup(env: persipubsub.environment.Environment,
-          sub_set: Set[str]) -> persipubsub.control.Control:
-    """Create an initialized control"""
-    hwm = persipubsub.queue.HighWaterMark()
-    strategy = persipubsub.queue.Strategy.PRUNE_FIRST
+class TestSubscriber(tests.QueueTestCase):
+    def test_receive_message(self) -> None:
+        env = self.env
 
-    control = env.new_control(
-        subscriber_ids=sub_set, high_water_mark=hwm, strategy=strategy)
+        subscriber = 'sub'
 
-    return control
+        sub = env.new_subscriber(identifier=subscriber)
+        queue = env.new_publisher().queue
+        assert queue is not None
 
+        msg = tests.MSG
+        queue.put(msg=msg)
 
-class TestSubscriber(unittest.TestCase):
-    def test_receive_message(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
+        with sub.receive(timeout=1) as received_msg:
+            self.assertIsNotNone(received_msg)
+            self.assertEqual(msg, received_msg)
 
-            subscriber = 'sub'
-            _ = setup(env=env, sub_set={subscriber})
+    def test_receive_zero_copy(self) -> None:
+        env = self.env
 
-            sub = env.new_subscriber(identifier=subscriber)
-            queue = env.new_publisher().queue
-            assert queue is not None
+        subscriber = 'sub'
 
-            msg = "Hello World!".encode(tests.ENCODING)
-            queue.put(msg=msg)
+        sub = env.new_subscriber(identifier=subscriber)
+        queue = env.new_publisher().queue
+        assert queue is not None
 
-            with sub.receive(timeout=1) as received_msg:
-                self.assertIsNotNone(received_msg)
-                self.assertEqual(msg, received_msg)
+        msg = tests.MSG
+        queue.put(msg=msg)
+
+        with sub.receive(zero_copy=True) as received_msg:
+            self.assertIsInstance(received_msg, memoryview)
+            assert received_msg is not None
+            self.assertEqual(msg, bytes(received_msg))
+
+        self.assertEqual((None, None), queue.front(sub_id=subscriber))
 
     def test_timeout_subscriber(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
+        env = self.env
 
-            subscriber = 'sub'
-            _ = setup(env=env, sub_set={subscriber})
+        subscriber = 'sub'
 
-            sub = env.new_subscriber(identifier=subscriber)
-            queue = env.new_publisher().queue
-            assert queue is not None
+        sub = env.new_subscriber(identifier=subscriber)
+        queue = env.new_publisher().queue
+        assert queue is not None
 
-            with sub.receive(timeout=1) as received_msg:
-                self.assertIsNone(received_msg)
-                msg = "message send after timeout and will not be popped" \
-                      "".encode(tests.ENCODING)
-                queue.put(msg=msg)
-                self.assertIsNone(received_msg)
+        msg = "message send after timeout and will not be popped".encode(
+            tests.ENCODING)
 
-            _, received_msg = queue.front(sub_id=subscriber)
+        with sub.receive(timeout=1) as received_msg:
+            self.assertIsNone(received_msg)
+            queue.put(msg=msg)
+            self.assertIsNone(received_msg)
 
-            self.assertEqual(
-                "message send after timeout and will not be popped".encode(
-                    tests.ENCODING), received_msg)
+        _, received_msg = queue.front(sub_id=subscriber)
 
-            with sub.receive(timeout=1) as received_msg:
-                self.assertIsNotNone(received_msg)
-                self.assertEqual(
-                    "message send after timeout and will not be popped".encode(
-                        tests.ENCODING), received_msg)
+        self.assertEqual(msg, received_msg)
 
-            _, received_msg = queue.front(sub_id=subscriber)
-            self.assertIsNone(received_msg)
+        with sub.receive(timeout=1) as received_msg:
+            self.assertIsNotNone(received_msg)
+            self.assertEqual(msg, received_msg)
+
+        _, received_msg = queue.front(sub_id=subscriber)
+        self.assertIsNone(received_msg)
+
+    def test_receive_wakes_up_on_publish(self) -> None:
+        env = self.env
+
+        subscriber = 'sub'
+
+        sub = env.new_subscriber(identifier=subscriber)
+        pub = env.new_publisher()
+
+        msg = tests.MSG
+        timer = threading.Timer(interval=0.5, function=pub.send, args=[msg])
+
+        start = time.time()
+        timer.start()
+        try:
+            # A single retry must not sleep for the whole timeout.
+            with sub.receive(timeout=20, retries=1) as received_msg:
+                self.assertEqual(msg, received_msg)
+        finally:
+            timer.join()
+            sub.close()
+
+        self.assertLess(time.time() - start, 10)
+
+    def test_receive_wakes_up_on_async_publish(self) -> None:
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
+            with persipubsub.environment.initialize(
+                    path=tmp_dir.path,
+                    durability=persipubsub.queue.Durability.ASYNC) as env:
+                env.new_control(subscriber_ids={'sub'})
+
+                sub = env.new_subscriber(identifier='sub')
+                pub = env.new_publisher()
+
+                msg = tests.MSG
+                timer = threading.Timer(
+                    interval=0.5, function=pub.send, args=[msg])
+
+                start = time.time()
+                timer.start()
+                try:
+                    # Commits through a writable memory map are visible to
+                    # the subscriber without the data file being written.
+                    with sub.receive(timeout=5, retries=1) as received_msg:
+                        self.assertEqual(msg, received_msg)
+                finally:
+                    timer.join()
+                    sub.close()
+
+        self.assertLess(time.time() - start, 2.5)
 
     def test_pop(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
+        env = self.env
 
-            subscriber = 'sub'
-            _ = setup(env=env, sub_set={subscriber})
+        subscriber = 'sub'
 
-            sub = env.new_subscriber(identifier=subscriber)
-            queue = env.new_publisher().queue
-            assert queue is not None
+        sub = env.new_subscriber(identifier=subscriber)
+        queue = env.new_publisher().queue
+        assert queue is not None
 
-            msg1 = "I'm a message".encode(tests.ENCODING)
-            queue.put(msg=msg1)
+        msg1 = tests.MSG
+        queue.put(msg=msg1)
 
-            msg2 = "I'm a message too".encode(tests.ENCODING)
-            queue.put(msg=msg2)
+        msg2 = tests.MSG_TOO
+        queue.put(msg=msg2)
 
-            msg_id, _ = queue.front(sub_id=subscriber)
-            assert msg_id is not None
-            sub._pop(msg_id=msg_id)
+        msg_id, _ = queue.front(sub_id=subscriber)
+        assert msg_id is not None
+        sub._pop(msg_id=msg_id)
 
-            with sub.receive() as msg:
-                self.assertIsNotNone(msg)
-                self.assertEqual(msg2, msg)
+        with sub.receive() as msg:
+            self.assertIsNotNone(msg)
+            self.assertEqual(msg2, msg)
 
     def test_pop_when_empty(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
+        env = self.env
 
-            subscriber = 'sub'
-            _ = setup(env=env, sub_set={subscriber})
+        subscriber = 'sub'
 
-            sub = env.new_subscriber(identifier=subscriber)
+        sub = env.new_subscriber(identifier=subscriber)
 
-            self.assertRaises(
-                RuntimeError, sub._pop, msg_id="".encode(tests.ENCODING))
+        with self.assertRaises(RuntimeError):
+            sub._pop(msg_id=b'')
 
     def test_receive_to_top(self) -> None:
-        with temppathlib.TemporaryDirectory() as tmp_dir:
-            env = persipubsub.environment.Environment(path=tmp_dir.path)
+        env = self.env
+
+        subscriber = 'sub'
+
+        sub = env.new_subscriber(identifier=subscriber)
+        queue = env.new_publisher().queue
+        assert queue is not None
+
+        msg1 = tests.MSG
+        queue.put(msg=msg1)
+
+        msg2 = tests.MSG_TOO
+        queue.put(msg=msg2)
+
+        with sub.receive_to_top() as msg:
+            self.assertIsNotNone(msg)
+            self.assertEqual(msg2, msg)
+
+    def test_receive_after_subscriber_db_recreated(self) -> None:
+        # The test changes the subscribers, so it does not use the shared
+        # queue.
+        with temppathlib.TemporaryDirectory(
+                base_tmp_dir=tests._tmp_root()) as tmp_dir:
+            with persipubsub.environment.initialize(path=tmp_dir.path) as env:
+                control = env.new_control(subscriber_ids={'sub'})
+
+                sub = env.new_subscriber(identifier='sub')
+                queue = env.new_publisher().queue
+                assert queue is not None
+
+                queue.put(msg=tests.MSG)
+                self.assertListEqual([tests.MSG],
+                                     sub.receive_many(max_msg_num=10))
+
+                # Dropping the database of 'sub' frees its handle, which the
+                # database of the next subscriber might reuse.
+                control._remove_sub(sub_id='sub')
+                control._add_subs(sub_ids={'other_sub'})
+                control._add_subs(sub_ids={'sub'})
+
+                queue = env.new_publisher().queue
+                assert queue is not None
+                queue.put(msg=tests.MSG_TOO)
+
+                self.assertListEqual([tests.MSG_TOO],
+                                     sub.receive_many(max_msg_num=10))
+                _, msg = queue.front(sub_id='other_sub')
+                self.assertEqual(tests.MSG_TOO, msg)
+
+    def test_receive_many(self) -> None:
+        env = self.env
 
-            subscriber = 'sub'
-            _ = setup(env=env, sub_set={subscriber})
+        subscriber = 'sub'
 
-            sub = env.new_subscriber(identifier=subscriber)
-            queue = env.new_publisher().queue
-            assert queue is not None
+        sub = env.new_subscriber(identifier=subscriber)
+        queue = env.new_publisher().queue
+        assert queue is not None
 
-            msg1 = "I'm a message".encode(tests.ENCODING)
-            queue.put(msg=msg1)
+        msg1 = tests.MSG
+        queue.put(msg=msg1)
 
-            msg2 = "I'm a message too".encode(tests.ENCODING)
-            queue.put(msg=msg2)
+        msg2 = tests.MSG_TOO
+        queue.put(msg=msg2)
 
-            with sub.receive_to_top() as msg:
-                self.assertIsNotNone(msg)
-                self.assertEqual(msg2, msg)
+        self.assertListEqual([msg1, msg2], sub.receive_many(max_msg_num=10))
+        self.assertListEqual([],
+                             sub.receive_many(
+                                 max_msg_num=10, timeout=1, retries=1))
 
 
 if __name__ == '__main__':